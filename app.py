@@ -1,539 +1,364 @@
+import time
+_run_started = time.perf_counter()
+
 import streamlit as st
 import os
-import sys
-from pathlib import Path
+import re
 import gc
-from firecrawl import FirecrawlApp
+import logging
+import functools
+import threading
+from collections import Counter
+from pathlib import Path
 from dotenv import load_dotenv
-import time
-import pandas as pd
-from typing import Dict, Any, List, Union
-import base64
-from pydantic import BaseModel, Field
-import inspect
 import traceback
 import random
 
 load_dotenv()
 from config.appconfig import FIRECRAWL_API_KEY
+# Only light modules are imported up front. firecrawl, pandas, pyarrow and pydantic
+# (via firecrawl_scraper.core / .columnar) load lazily on first extraction.
+from firecrawl_scraper.history import ChatHistory, ExpiredResult, SpilledResult, cleanup_stale_sessions
+from firecrawl_scraper.cache import ExtractionCache
+from firecrawl_scraper.extraction import SINGLE_FLIGHT, estimate_progress
+from firecrawl_scraper.incremental import SnapshotStore, default_keys
+from firecrawl_scraper.ratelimit import FairRateLimiter, LimitedApp, RateLimitStore
+from firecrawl_scraper.batch import DEFAULT_CONCURRENCY, parse_url_list, read_urls_csv
+from firecrawl_scraper.jobs import JobQueue, JobStore
+from firecrawl_scraper.local import LOCAL_FIRST
+from firecrawl_scraper.pages import PageCache
+from firecrawl_scraper.sessions import SessionRegistry
+from firecrawl_scraper.metrics import METRICS, PAYLOAD_BYTES, RESULT_ROWS, STAGE_SECONDS, format_seconds, start_exporters
+from firecrawl_scraper.profiling import PROFILE_ENABLED, Profile, ProfileRing, StackSampler
+from firecrawl_scraper.crawl import (DEFAULT_MAX_DEPTH as DEFAULT_CRAWL_DEPTH, DEFAULT_MAX_PAGES as DEFAULT_CRAWL_PAGES,
+                                     parse_patterns, split_wildcard)
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent / "static"
+# Prepared exports; Streamlit serves them from app/static/ (server.enableStaticServing in .streamlit/config.toml)
+EXPORT_DIR = STATIC_DIR / "exports"
+EXPORT_URL = "app/static/exports"
+
+@st.cache_resource
+def load_static_asset(name):
+    """Read a static CSS/HTML asset once per process, minified to keep per-rerun payloads small."""
+    text = (STATIC_DIR / name).read_text(encoding="utf-8")
+    if name.endswith(".css"):
+        text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+        text = re.sub(r"\s*([{};:,>])\s*", r"\1", text)
+        text = f"<style>{text}</style>"
+    return re.sub(r">\s+<", "><", re.sub(r"\s+", " ", text)).strip()
 
 #============================
 # Custom CSS for enhanced UI
 #============================
 def apply_custom_css():
-    st.markdown("""
-    <style>
-    /* Dark theme compatibility */
-    [data-theme="dark"] {
-        --primary-color: #FF6B6B;
-        --secondary-color: #4DA8DA;
-        --background-color: #1E1E1E;
-        --card-background: #2D2D2D;
-        --text-color: #E0E0E0;
-        --sidebar-color: #252525;
-    }
-    /* Main color scheme */
-    :root {
-        --primary-color: #FF4B4B;
-        --secondary-color: #0083B8;
-        --background-color: #f8f9fa;
-        --card-background: white;
-        --text-color: #333;
-        --sidebar-color: #f0f2f6;
-    }
-    
-    /* Overall page styling */
-    .main {
-        background-color: var(--background-color);
-        padding: 1rem;
-    }
-    
-    /* Header styling */
-    h1 {
-        color: var(--primary-color);
-        font-size: 2.5rem !important;
-        font-weight: 700 !important;
-        margin-bottom: 1.5rem !important;
-    }
-    
-    h2, h3 {
-        color: var(--secondary-color);
-        font-weight: 600 !important;
-    }
-    
-    /* Card styling */
-    .css-1r6slb0, .css-keje6w {
-        background-color: var(--card-background);
-        border-radius: 10px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        padding: 1.5rem !important;
-        margin-bottom: 1.5rem;
-    }
-    
-    /* Chat message styling */
-    .stChatMessage {
-        background-color: var(--card-background);
-        border-radius: 15px;
-        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.05);
-        transition: transform 0.2s;
-    }
-    
-    .stChatMessage:hover {
-        transform: translateY(-2px);
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        border-radius: 8px;
-        font-weight: 600;
-        transition: all 0.2s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* Sidebar styling */
-    .css-1544g2n {
-        background-color: var(--sidebar-color);
-    }
-    
-    /* Table styling */
-    # table {
-    #     width: 100%;
-    #     border-collapse: separate;
-    #     border-spacing: 0;
-    #     margin: 1rem 0;
-    #     border-radius: 8px;
-    #     overflow: hidden;
-    #     box-shadow: 0 2px 6px rgba(0, 0, 0, 0.1);
-    # }
-    /* Table styling - Updated for better dark mode compatibility */
-    table {
-        width: 100%;
-        border-collapse: separate;
-        border-spacing: 0;
-        margin: 1rem 0;
-        border-radius: 8px;
-        overflow: hidden;
-        box-shadow: 0 2px 6px rgba(0, 0, 0, 0.1);
-        color: var(--text-color);
-    }
-    
-    th {
-        background-color: var(--secondary-color);
-        color: white;
-        padding: 12px 15px;
-        text-align: left;
-        font-weight: 600;
-    }
-    
-    td {
-        padding: 10px 15px;
-        border-bottom: 1px solid var(--sidebar-color);
-        background-color: var(--card-background);
-    }
-    
-    tr:nth-child(even) {
-        background-color: #f9f9f9;
-    }
-    
-    tr:last-child td {
-        border-bottom: none;
-    }
-    
-    tr:hover {
-        background-color: #f0f7ff;
-    }
-    
-    /* Input field styling */
-    .stTextInput > div > div > input {
-        border-radius: 8px;
-    }
-    
-    /* Logo animation */
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-        100% { transform: scale(1); }
-    }
-    
-    .logo-animation {
-        animation: pulse 2s infinite;
-        display: inline-block;
-    }
-    
-    /* Progress bar */
-    .stProgress > div > div > div > div {
-        background-color: var(--primary-color);
-    }
-    
-    /* Feature card */
-    .feature-card {
-        background-color: white;
-        border-radius: 10px;
-        padding: 1.5rem;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-bottom: 1rem;
-        border-left: 4px solid var(--primary-color);
-        transition: transform 0.2s, box-shadow 0.2s;
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 6px 12px rgba(0, 0, 0, 0.15);
-    }
-    
-    /* User message styling */
-    .user-message {
-        background-color: var(--sidebar-color) !important;
-        border-radius: 18px 18px 0 18px !important;
-        color: var(--text-color) !important;
-    }
-    
-    .assistant-message {
-        background-color: var(--card-background) !important;
-        border-radius: 18px 18px 18px 0 !important;
-        color: var(--text-color) !important;
-    }
-    
-    /* Loading animation */
-    .loading-animation {
-        display: inline-block;
-        width: 20px;
-        height: 20px;
-        border: 3px solid rgba(0, 0, 0, 0.1);
-        border-radius: 50%;
-        border-top-color: var(--primary-color);
-        animation: spin 1s ease-in-out infinite;
-    }
-    
-    @keyframes spin {
-        to { transform: rotate(360deg); }
-    }
-    
-    /* Footer styling */
-    .footer {
-        margin-top: 2rem;
-        padding-top: 1rem;
-        border-top: 1px solid #eee;
-        text-align: center;
-        color: #777;
-        font-size: 0.85rem;
-    }
-    
-    /* Tooltip */
-    .tooltip {
-        position: relative;
-        display: inline-block;
-        cursor: pointer;
-    }
-    
-    .tooltip .tooltiptext {
-        visibility: hidden;
-        width: 200px;
-        background-color: #555;
-        color: #fff;
-        text-align: center;
-        border-radius: 6px;
-        padding: 10px;
-        position: absolute;
-        z-index: 1;
-        bottom: 125%;
-        left: 50%;
-        margin-left: -100px;
-        opacity: 0;
-        transition: opacity 0.3s;
-    }
-    
-    .tooltip:hover .tooltiptext {
-        visibility: visible;
-        opacity: 1;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(load_static_asset("style.css"), unsafe_allow_html=True)
 
 #=============================
 # Feature highlight cards
 #=============================
 def render_logo():
-    st.markdown("""
-    <div style="display: flex; align-items: center; margin-bottom: 20px;">
-        <div class="logo-animation" style="font-size: 3rem; margin-right: 15px;">🕸️</div>
-        <div>
-            <h1 style="margin: 0; padding: 0;">Firecrawl Scraper</h1>
-            <p style="color: #777; margin: 0; padding: 0;">Turn any website into structured data with AI</p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(load_static_asset("logo.html"), unsafe_allow_html=True)
 
 #=============================
 # Logo and Branding
 #=============================
 def render_feature_cards():
-    st.markdown("""
-    <div style="display: flex; flex-wrap: wrap; justify-content: space-between; margin: 20px 0;">
-        <div class="feature-card" style="flex: 0 0 calc(33% - 20px);">
-            <h3 style="color: #FF4B4B;">🔍 Instant Extraction</h3>
-            <p>Extract structured data from any website using natural language prompts.</p>
-        </div>
-        <div class="feature-card" style="flex: 0 0 calc(33% - 20px);">
-            <h3 style="color: #FF4B4B;">⚙️ Custom Schema</h3>
-            <p>Define exactly what data you need with our simple schema builder.</p>
-        </div>
-        <div class="feature-card" style="flex: 0 0 calc(33% - 20px);">
-            <h3 style="color: #FF4B4B;">🔄 API Conversion</h3>
-            <p>Convert any website into a structured API that returns clean JSON.</p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-#=============================
-# Animated loading component
-#=============================  
-def animated_loading(message="Processing"):
-    loading_container = st.empty()
-    loading_messages = [
-        "Analyzing website structure...",
-        "Identifying relevant elements...",
-        "Extracting requested data...",
-        "Processing information...",
-        "Formatting results...",
-        "Almost there..."
-    ]
-    
-    progress_bar = st.progress(0)
+    st.markdown(load_static_asset("feature_cards.html"), unsafe_allow_html=True)
     
-    for i in range(101):
-        # Update message occasionally
-        if i % 20 == 0:
-            current_message = loading_messages[i // 20] if i // 20 < len(loading_messages) else loading_messages[-1]
-            loading_container.markdown(f"<div style='display: flex; align-items: center;'><div class='loading-animation'></div><div style='margin-left: 10px;'>{current_message}</div></div>", unsafe_allow_html=True)
-        
-        # Update progress bar
-        progress_bar.progress(i)
-        time.sleep(0.02)
-    
-    return loading_container, progress_bar
-
 #=============================
-# Display extraction results with typing animation effect
+# Extraction job progress
 #=============================
-def display_result_with_animation(data, delay=0.01):
-    """Display extraction results with typing animation effect."""
-    # Create empty placeholder
-    result_container = st.empty()
-    
-    # Start with "Extraction complete!" message
-    result_container.markdown("""
-    <div style="background-color: #f0fff4; padding: 15px; border-radius: 10px; border-left: 4px solid #38a169; margin-bottom: 20px;">
-        <h3 style="margin-top: 0; color: #38a169;">✅ Extraction Complete!</h3>
-        <p>Here's what we found:</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    time.sleep(1)  # Pause for emphasis
-    
-    # Display the data table
-    if isinstance(data, str):
-        result_container.markdown(data)
+JOB_POLL_INTERVAL = 0.5
+LATENCY_STAGES = ("schema", "queue", "rate_limit_wait", "firecrawl_http", "local_extract", "extract", "format",
+                  "first_row", "render", "turn")
+
+def new_job_progress(job):
+    """Per-session accumulator for a job's results, so each poll only formats new URLs."""
+    spec = job["spec"]
+    return {
+        "id": job["id"],
+        # A requeued job starts over with no results, and so does its progress
+        "attempt": job["attempt"],
+        "created_at": job["created_at"],
+        "first_row_seconds": None,
+        "seen": 0,
+        "frames": [],
+        # Text tables of the rows so far and how many frames they hold, kept across polls
+        "live": {"offset": 0, "chunks": []},
+        "statuses": [],
+        "fields": spec.get("fields"),
+        "diff_keys": default_keys(spec.get("fields")) if spec.get("changes_only") else None,
+    }
+
+def collect_results(progress, results):
+    """Format newly finished URLs of a job into progress["frames"] and progress["statuses"].
+
+    With diff_keys set (incremental runs), each page contributes only its rows added,
+    removed or changed since the previous run.
+    """
+    import pandas as pd
+    from firecrawl_scraper.core import format_extraction_result
+    from firecrawl_scraper.incremental import diff_extraction
+
+    fields, diff_keys = progress["fields"], progress["diff_keys"]
+    for result in results:
+        rows = 0
+        if result.ok:
+            with METRICS.timer("format"):
+                if diff_keys is not None:
+                    formatted = diff_extraction(result.previous, result.data, fields, diff_keys)
+                else:
+                    formatted = format_extraction_result(result.data, fields)
+            if isinstance(formatted, pd.DataFrame) and not (diff_keys is not None and formatted.empty):
+                rows = len(formatted)
+                METRICS.observe(RESULT_ROWS, rows)
+                progress["frames"].append(formatted.assign(source_url=result.url))
+                if rows and progress["first_row_seconds"] is None:
+                    progress["first_row_seconds"] = time.time() - progress["created_at"]
+                    METRICS.observe(STAGE_SECONDS, progress["first_row_seconds"], stage="first_row")
+        if not result.ok:
+            status = "❌ failed"
+        elif result.cached:
+            status = "✅ cached"
+        elif result.local:
+            status = "⚡ local"
+        else:
+            status = "⏭️ unchanged" if result.unchanged else "✅ done"
+        progress["statuses"].append({
+            "source_url": result.url,
+            "status": status,
+            "rows": rows,
+            "seconds": round(result.elapsed, 1),
+            "error": result.error or "",
+        })
+    progress["seen"] += len(results)
+
+def merge_results(progress):
+    """Merged result table of a finished job, or a message when it produced no rows."""
+    import pandas as pd
+
+    if not progress["frames"]:
+        return "No changes since the last run" if progress["diff_keys"] is not None else "No data extracted"
+    merged = pd.concat(progress["frames"], ignore_index=True)
+    # Keep source_url as the leading column
+    return merged[["source_url"] + [c for c in merged.columns if c != "source_url"]]
+
+# Rows per live-table chunk. A full chunk never changes again, so drawing it on every
+# poll sends identical bytes, which Streamlit's message cache replaces by a reference.
+LIVE_CHUNK_ROWS = 500
+
+def live_chunks(progress):
+    """A running job's rows so far, as Arrow tables of up to LIVE_CHUNK_ROWS rows each.
+
+    Only the frames of pages that finished since the last poll are converted; they
+    fill up the last chunk, then start new ones. Rows are text so pages whose
+    columns came out with different types line up; the typed table replaces them
+    when the job finishes.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    frames, live = progress["frames"], progress["live"]
+    if live["offset"] < len(frames):
+        new_rows = pd.concat(frames[live["offset"]:], ignore_index=True).astype("string")
+        new_rows = pa.Table.from_pandas(new_rows[["source_url"] + [c for c in new_rows.columns if c != "source_url"]],
+                                        preserve_index=False)
+        chunks = live["chunks"]
+        if chunks and chunks[-1].num_rows < LIVE_CHUNK_ROWS:
+            new_rows = pa.concat_tables([chunks.pop(), new_rows], promote_options="permissive")
+        for start in range(0, new_rows.num_rows, LIVE_CHUNK_ROWS):
+            chunks.append(new_rows.slice(start, LIVE_CHUNK_ROWS))
+        live["offset"] = len(frames)
+        st.session_state.messages.report("live_table", sum(chunk.nbytes for chunk in chunks))
+    return live["chunks"]
+
+def job_notices(job, progress, extraction_number):
+    """Success / info notices summarizing a finished job."""
+    import pandas as pd
+
+    spec = job["spec"]
+    statuses = pd.DataFrame(progress["statuses"], columns=["source_url", "status", "rows", "seconds", "error"])
+    failed = int((statuses["error"] != "").sum())
+    notices = []
+    if spec.get("crawl"):
+        notices.append({"kind": "info", "text": f"🕸️ Discovered {job['total']} pages under {spec['crawl']['root_url']}"})
+
+    if spec.get("changes_only"):
+        unchanged = int((statuses["status"] == "⏭️ unchanged").sum())
+        notices.append({
+            "kind": "success",
+            "text": f"✅ Extraction #{extraction_number}: {len(statuses) - unchanged - failed} pages re-extracted, {unchanged} unchanged, {failed} failed",
+            "table": statuses
+        })
+    elif spec["mode"] != "Single URL":
+        notices.append({
+            "kind": "success",
+            "text": f"✅ {spec['mode']} extraction #{extraction_number} finished: {len(statuses) - failed} succeeded, {failed} failed",
+            "table": statuses
+        })
+    elif failed:
+        notices.append({"kind": "error", "text": f"❌ An error occurred: {statuses['error'].iloc[0]}"})
     else:
-        result_container.dataframe(data)
-    
-    return result_container
-    
+        if statuses["status"].iloc[0] == "✅ cached":
+            notices.append({"kind": "info", "text": "⚡ Served from cache"})
+        elif statuses["status"].iloc[0] == "⚡ local":
+            notices.append({"kind": "info", "text": "⚡ Extracted locally from the page, without an extract call"})
+        notices.append({"kind": "success", "text": f"✅ Extraction #{extraction_number} completed successfully!"})
+    return notices
+
+def get_batch_urls():
+    """Collect batch URLs from the pasted list and the uploaded CSV, de-duplicated in order."""
+    urls = parse_url_list(st.session_state.get("batch_urls", ""))
+    uploaded = st.session_state.get("batch_csv")
+    if uploaded is not None:
+        uploaded.seek(0)
+        urls += read_urls_csv(uploaded)
+    return list(dict.fromkeys(urls))
 
+def crawl_settings(website_url):
+    """Crawl scope for a crawl-mode job, from the website URL and the crawl settings."""
+    root_url, include = split_wildcard(website_url)
+    return {
+        "root_url": root_url,
+        "include": include + parse_patterns(st.session_state.get("crawl_include", "")),
+        "exclude": parse_patterns(st.session_state.get("crawl_exclude", "")),
+        "max_depth": st.session_state.get("crawl_depth", DEFAULT_CRAWL_DEPTH),
+        "max_pages": int(st.session_state.get("crawl_pages", DEFAULT_CRAWL_PAGES)),
+    }
 
 @st.cache_resource
 def load_app():
-    app = FirecrawlApp(api_key=FIRECRAWL_API_KEY)
+    # One pooled, retrying client shared by every session on this server
+    from firecrawl_scraper.transport import PooledFirecrawlApp
+
+    app = PooledFirecrawlApp(api_key=FIRECRAWL_API_KEY)
     return app
 
-# Initialize session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+@st.cache_resource
+def load_limiter():
+    # Rate and credit spend are shared through SQLite with any `python -m firecrawl_scraper worker`
+    return FairRateLimiter(store=RateLimitStore())
 
-if "schema_fields" not in st.session_state:
-    st.session_state.schema_fields = [{"name": "", "type": "str"}]
+@st.cache_resource
+def load_jobs():
+    """Job queue and its worker pool, shared by every session on this server."""
+    app, limiter = load_app(), load_limiter()
+    store = JobStore()
+    store.purge()
+    # Each job's billable calls are queued under the session that submitted it
+    return JobQueue(store, lambda session_id: LimitedApp(app, limiter, session_id),
+                    cache=load_cache(), snapshots=load_snapshots(), pages=load_pages())
 
-if "extraction_count" not in st.session_state:
-    st.session_state.extraction_count = 0
+@st.cache_resource
+def load_cache():
+    return ExtractionCache()
 
-if "show_intro" not in st.session_state:
-    st.session_state.show_intro = True
+@st.cache_resource
+def load_snapshots():
+    return SnapshotStore()
 
-def reset_chat():
-    st.session_state.messages = []
-    gc.collect()
+@st.cache_resource
+def load_pages():
+    return PageCache()
 
-def create_dynamic_model(fields):
-    """Create a dynamic Pydantic model from schema fields."""
-    field_annotations = {}
-    for field in fields:
-        if field["name"]:
-            # Convert string type names to actual types
-            type_mapping = {
-                "str": str,
-                "bool": bool,
-                "int": int,
-                "float": float
-            }
-            field_annotations[field["name"]] = type_mapping[field["type"]]
-    
-    # Dynamically create the model class
-    return type(
-        "ExtractSchema",
-        (BaseModel,),
-        {
-            "__annotations__": field_annotations
-        }
-    )
+@st.cache_resource
+def load_metrics_exporters():
+    # FIRECRAWL_METRICS_PORT / FIRECRAWL_METRICS_FILE; nothing is started when neither is set
+    return start_exporters()
 
-def create_schema_from_fields(fields):
-    """Create schema using Pydantic model."""
-    if not any(field["name"] for field in fields):
-        return None
-    
-    model_class = create_dynamic_model(fields)
-    return model_class.model_json_schema()
+@st.cache_resource
+def load_sessions():
+    """Every session's chat history on this server, kept under FIRECRAWL_MEMORY_BUDGET_BYTES."""
+    return SessionRegistry()
 
-def convert_to_table(data: Union[List[Dict], Dict]) -> str:
-    """Convert data to a markdown table.
-    
-    Args:
-        data: Either a list of dictionaries or a dictionary
-        
-    Returns:
-        A markdown table representation of the data
-    """
-    if not data:
-        return "No data extracted"
-    
-    try:
-        # Handle different data structures
-        if isinstance(data, dict):
-            # If it's a dictionary, convert to a dataframe with one row
-            df = pd.DataFrame([data])
-        elif isinstance(data, list):
-            if all(isinstance(item, dict) for item in data):
-                # If it's a list of dictionaries, convert to dataframe
-                df = pd.DataFrame(data)
-            else:
-                # If it's a list of non-dictionaries, create a simple dataframe
-                df = pd.DataFrame({"Value": data})
-        else:
-            # For other types, create a simple one-cell dataframe
-            df = pd.DataFrame({"Value": [str(data)]})
-        
-        # Handle empty dataframe
-        if df.empty:
-            return "No data extracted"
-            
-        # Return as markdown table
-        return df.to_markdown(index=False)
-    
-    except Exception as e:
-        st.error(f"Error converting data to table: {str(e)}")
-        return f"```\n{str(data)}\n```"
+@st.cache_resource
+def cleanup_history():
+    # Runs once per server process: drop spill files and exports left behind by ended sessions
+    cleanup_stale_sessions(EXPORT_DIR)
+    return cleanup_stale_sessions()
 
-def stream_text(text: str, delay: float = 0.001) -> None:
-    """Stream text with a typing effect."""
-    placeholder = st.empty()
-    displayed_text = ""
-    
-    for char in text:
-        displayed_text += char
-        placeholder.markdown(displayed_text)
-        time.sleep(delay)
-    
-    return placeholder
+@st.cache_resource
+def load_export_pool():
+    """Threads that write exports, so a large one doesn't hold up the session's script thread."""
+    from concurrent.futures import ThreadPoolExecutor
 
-def format_extraction_result(data):
-    """Format the extraction result for display with improved handling for lists of items."""
-    if not data:
-        return "No data extracted"
-    
-    try:
-        # Check various data structures that might be returned
-        if 'data' in data:
-            result_data = data['data']
-            
-            # Handle case where data is a single project instead of a list of projects
-            if isinstance(result_data, dict) and not any(isinstance(v, list) for v in result_data.values()):
-                # Convert single project to a list of one project
-                result_data = [result_data]
-                return pd.DataFrame(result_data)  # Return DataFrame instead of Markdown
-            
-            # Handle case where data is a dictionary with a key containing a list of projects
-            elif isinstance(result_data, dict):
-                for key, value in result_data.items():
-                    if isinstance(value, list) and len(value) > 0:
-                        # If we find a list in any of the values, use that for the table
-                        return pd.DataFrame(value)  # Return DataFrame instead of Markdown
-                
-                # If we didn't find a list but have dict data, convert the dict to a list of one item
-                return pd.DataFrame([result_data])  # Return DataFrame instead of Markdown
-            
-            # Handle case where data is already a list of projects
-            elif isinstance(result_data, list):
-                return pd.DataFrame(result_data)  # Return DataFrame instead of Markdown
-            
-            else:
-                return f"```\n{str(result_data)}\n```"
-        else:
-            return pd.DataFrame(data if isinstance(data, list) else [data])  # Return DataFrame instead of Markdown
-            
-    except Exception as e:
-        st.error(f"Error formatting extraction result: {str(e)}")
-        return f"```\n{str(data)}\n```"
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
 
+def init_session_state():
+    """Initialize per-session state on the first run of a session."""
+    if "messages" not in st.session_state:
+        cleanup_history()
+        load_metrics_exporters()
+        st.session_state.messages = ChatHistory()
+        load_sessions().register(st.session_state.messages)
 
-# Improve the extraction call with more specific parameters
-def extract_projects(app, website_url, prompt):
-    """Enhanced extraction function specifically for projects."""
-    
-    # Create a more specific schema for projects
-    projects_schema = {
-        "type": "object",
-        "properties": {
-            "projects": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "description": {"type": "string"},
-                        "link": {"type": "string"}
-                    },
-                    "required": ["title"]
-                }
-            }
-        }
-    }
-    
-    # More specific extraction parameters
-    extract_params = {
-        'prompt': prompt,
-        'schema': projects_schema,
-        'include_html': True,  # Sometimes helps with extraction
-        'max_results': 20  # Ensure we get multiple results
-    }
-    
-    return app.extract(
-        [website_url],
-        extract_params
-    )
+    # This session is in use; idle ones give their results back first when memory runs short
+    st.session_state.messages.touch()
+    load_sessions().enforce()
+
+    if "schema_fields" not in st.session_state:
+        st.session_state.schema_fields = [{"name": "", "type": "str"}]
+
+    if "extraction_count" not in st.session_state:
+        st.session_state.extraction_count = 0
+
+    if "show_intro" not in st.session_state:
+        st.session_state.show_intro = True
+
+    # A reload or reconnect starts a new session; pick the running job back up from the URL
+    if "active_job" not in st.session_state and st.query_params.get("job"):
+        st.session_state.active_job = st.query_params["job"]
+        st.session_state.show_intro = False
+
+def reset_chat():
+    st.session_state.messages.clear()
+    gc.collect()
 
 # ===========================
 #   Chat Interface
 # ===========================
-def show_chat_message(message, is_user=False):
+@METRICS.timer("render")
+def show_chat_message(message, is_user=False, key=None):
     """Display chat messages with enhanced styling."""
+    from firecrawl_scraper.columnar import is_table
+
     message_class = "user-message" if is_user else "assistant-message"
     
-    # Handle DataFrame display differently
-    if isinstance(message, pd.DataFrame):
+    # Results dropped while the session sat idle can only be extracted again
+    if isinstance(message, ExpiredResult):
+        st.markdown(f"""
+        <div class="{message_class}" style="padding: 15px; margin-bottom: 10px;">
+            <div style="display: flex; align-items: flex-start;">
+                <div style="width: 35px; height: 35px; border-radius: 50%; background-color: {'#0083B8' if is_user else '#FF4B4B'}; color: white; display: flex; justify-content: center; align-items: center; margin-right: 10px; font-weight: bold;">
+                    {'U' if is_user else 'F'}
+                </div>
+                <div style="flex-grow: 1;">
+                    <p>⌛ These results ({message.num_rows} rows) expired while the session was idle. Send the prompt again to reload them.</p>
+                </div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    # Results moved to disk by ChatHistory are only loaded when asked for
+    elif isinstance(message, SpilledResult):
+        st.markdown(f"""
+        <div class="{message_class}" style="padding: 15px; margin-bottom: 10px;">
+            <div style="display: flex; align-items: flex-start;">
+                <div style="width: 35px; height: 35px; border-radius: 50%; background-color: {'#0083B8' if is_user else '#FF4B4B'}; color: white; display: flex; justify-content: center; align-items: center; margin-right: 10px; font-weight: bold;">
+                    {'U' if is_user else 'F'}
+                </div>
+                <div style="flex-grow: 1;">
+                    <p>Here's what I found ({message.num_rows} rows, archived to disk):</p>
+                </div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        if st.toggle(f"Show {message.num_rows} rows", key=key):
+            st.dataframe(message.load(), use_container_width=True)
+    # Handle table (Arrow / DataFrame) display differently
+    elif not isinstance(message, str) and is_table(message):
         st.markdown(f"""
         <div class="{message_class}" style="padding: 15px; margin-bottom: 10px;">
             <div style="display: flex; align-items: flex-start;">
@@ -578,158 +403,342 @@ def add_example_button():
     
     return 
 
+def render_notice(notice):
+    """Show a message left by the previous extraction turn."""
+    getattr(st, notice["kind"])(notice["text"])
+    if notice.get("table") is not None:
+        with st.expander("Per-URL status"):
+            st.dataframe(notice["table"], use_container_width=True, hide_index=True)
+    if notice.get("details"):
+        with st.expander("Error Details"):
+            st.code(notice["details"])
+
+def run_extraction_turn(prompt):
+    """Queue a background job for the submitted prompt and attach this session to it.
+
+    Returns notices to show after the rerun; the result itself is added to the chat
+    by render_active_job once the job finishes.
+    """
+    from firecrawl_scraper.core import create_schema_from_fields
+
+    # Get website URL(s) from the sidebar
+    website_url = st.session_state.get("website_url", "")
+    mode = st.session_state.get("extraction_mode") or "Single URL"
+    crawl_mode = mode == "Crawl"
+    batch_mode = mode == "Batch"
+    batch_urls = get_batch_urls() if batch_mode else []
+
+    if batch_mode and not batch_urls:
+        return [{"kind": "error", "text": "⚠️ Please paste URLs or upload a CSV in the batch settings first!"}]
+    if not batch_mode and not website_url:
+        return [{"kind": "error", "text": "⚠️ Please enter a website URL in the sidebar first!"}]
+    if not batch_mode and not (website_url.startswith('http://') or website_url.startswith('https://')):
+        return [{"kind": "error", "text": "⚠️ Please enter a valid URL starting with http:// or https://"}]
+
+    try:
+        with METRICS.timer("schema"):
+            schema = create_schema_from_fields(st.session_state.schema_fields)
+
+        extract_params = {
+            'prompt': prompt,
+            'max_results': 20
+        }
+        if schema:
+            extract_params['schema'] = schema
+
+        spec = {
+            "mode": mode,
+            "urls": batch_urls if batch_mode else [] if crawl_mode else [website_url],
+            "crawl": crawl_settings(website_url) if crawl_mode else None,
+            "extract_params": extract_params,
+            "fields": st.session_state.schema_fields,
+            "concurrency": st.session_state.get("batch_concurrency", DEFAULT_CONCURRENCY),
+            "use_cache": not st.session_state.get("bypass_cache"),
+            "changes_only": st.session_state.get("changes_only", False),
+            "local_first": st.session_state.get("local_first", LOCAL_FIRST),
+        }
+        attach_job(load_jobs().submit(st.session_state.messages.session_id, spec))
+    except Exception as e:
+        return [{"kind": "error", "text": f"❌ An error occurred: {str(e)}", "details": traceback.format_exc()}]
+
+    return []
+
+def attach_job(job_id):
+    """Follow a job from this session; the id also goes into the URL so a reload re-attaches."""
+    st.session_state.active_job = job_id
+    st.session_state.pop("job_progress", None)
+    st.query_params["job"] = job_id
+
+def detach_job():
+    st.session_state.pop("active_job", None)
+    st.session_state.pop("job_progress", None)
+    st.session_state.messages.report("live_table", 0)
+    st.query_params.pop("job", None)
+
+def finish_job(job, progress):
+    """Add a finished job's result to the chat and queue its notices for the next run."""
+    import pandas as pd
+    from firecrawl_scraper.columnar import to_arrow_table
+
+    notices = []
+    if job["started_at"] is not None:
+        METRICS.observe(STAGE_SECONDS, job["started_at"] - job["created_at"], stage="queue")
+    METRICS.observe(STAGE_SECONDS, job["finished_at"] - job["created_at"], stage="turn")
+    if job["status"] == "failed":
+        notices.append({"kind": "error", "text": f"❌ An error occurred: {job['error']}"})
+    else:
+        formatted_result = merge_results(progress)
+        # Single-URL results don't need a source column
+        if job["spec"]["mode"] == "Single URL" and isinstance(formatted_result, pd.DataFrame) and not job["spec"].get("changes_only"):
+            formatted_result = formatted_result.drop(columns="source_url")
+        # Convert once to Arrow; history, rendering and exports all use this table
+        if isinstance(formatted_result, pd.DataFrame):
+            formatted_result = to_arrow_table(formatted_result, progress["fields"])
+            METRICS.observe(PAYLOAD_BYTES, formatted_result.nbytes, stage="result")
+
+        # Increment extraction count
+        st.session_state.extraction_count += 1
+        st.session_state.messages.append({"role": "assistant", "content": formatted_result})
+        load_sessions().enforce(force=True)
+        notices = job_notices(job, progress, st.session_state.extraction_count)
+
+    st.session_state.turn_notices = st.session_state.get("turn_notices", []) + notices
+    detach_job()
+
 # ===========================
-#   Streamlit Setup
+#   Profiling
 # ===========================
-st.set_page_config(
-        page_title="Firecrawl Web Scraper",
-        page_icon="🕸️",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
+# Opt-in via FIRECRAWL_PROFILE=1, or the sidebar toggle shown when the URL has ?profile=1.
+# Every full rerun and fragment rerun is stack-sampled; the reruns between submitting
+# a prompt and its result landing in the chat are also merged into one turn profile.
+_profiling = threading.local()
+
+def profiling_enabled():
+    return st.session_state.get("profiling", PROFILE_ENABLED)
+
+def profiled(label):
+    """Sample the wrapped script or fragment run when profiling is on; nested runs join the outer sample."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_profiling, "active", False) or not profiling_enabled():
+                return func(*args, **kwargs)
+            in_turn = "active_job" in st.session_state
+            started_at, started = time.time(), time.perf_counter()
+            sampler = StackSampler().start()
+            _profiling.active = True
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _profiling.active = False
+                record_profile(label, sampler.stop(), started_at, time.perf_counter() - started, in_turn)
+        return wrapper
+    return decorator
+
+def record_profile(label, samples, started_at, seconds, in_turn):
+    history = st.session_state.get("messages")
+    history_stats = history.stats() if history is not None else {"rows": 0}
+    tags = {"messages": len(history or ()), "rows": history_stats["rows"]}
+    ring = st.session_state.setdefault("profiles", ProfileRing())
+    ring.add(Profile("rerun", label, started_at, seconds, samples, tags))
+    if history is not None:
+        history.report("profiles", ring.nbytes())
 
-# Apply custom CSS
-apply_custom_css()
+    if not (in_turn or "active_job" in st.session_state):
+        return
+    turn = st.session_state.setdefault("turn_profile", {"started_at": started_at, "seconds": 0.0, "samples": Counter()})
+    turn["seconds"] += seconds
+    turn["samples"].update(samples)
+    # The job was attached or is still running after this run; the turn ends with the run that detached it
+    if "active_job" not in st.session_state:
+        st.session_state.pop("turn_profile")
+        ring.add(Profile("turn", f"{st.session_state.extraction_count}", turn["started_at"], turn["seconds"],
+                         turn["samples"], tags))
+        history.report("profiles", ring.nbytes())
 
+def render_profiles():
+    ring = st.session_state.get("profiles")
+    if not ring:
+        return
+    profiles = ring.latest_first()
+    with st.expander(f"🔬 Profiles ({len(profiles)})"):
+        choice = st.selectbox("Profile", options=range(len(profiles)), format_func=lambda i: profiles[i].describe(),
+                              key="profile_choice")
+        profile = profiles[min(choice or 0, len(profiles) - 1)]
+        st.download_button(
+            "Download collapsed stacks",
+            data=profile.collapsed(),
+            file_name=profile.filename(),
+            mime="text/plain",
+            help="Open in speedscope.app or render with flamegraph.pl",
+            use_container_width=True
+        )
 
 # ===========================
-#   Main Chat Interface
+#   Fragments
 # ===========================
+# The chat history, the input area and the schema builder each rerun on their own,
+# so editing the schema or toggling an archived result costs the same regardless
+# of how long the conversation is.
 
-# Main interface columns
-left_col, right_col = st.columns([2, 1])
+@st.fragment
+@profiled("chat_history")
+def render_chat_history():
+    chat_container = st.container(height=400)
+    with chat_container:
+        for index, message in enumerate(st.session_state.messages):
+            show_chat_message(message["content"], message["role"] == "user", key=f"message_{index}")
 
-with left_col:
-    render_logo()
-    
-    if st.session_state.show_intro:
-        st.markdown("""
-        <div style="background-color: #f0f7ff; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
-            <h2 style="color: #0083B8; margin-top: 0;">Extract Data from Any Website</h2>
-            <p>This app uses AI to convert websites into structured data. Simply:</p>
-            <ol>
-                <li><b>Enter a website URL</b> in the sidebar</li>
-                <li><b>Define a schema</b> (optional) or use our default extraction</li>
-                <li><b>Ask a question</b> about what you want to extract</li>
-            </ol>
-            <p>Try prompts like "Extract all product prices" or "Get all article titles and authors"</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        render_feature_cards()
-        
-        if st.button("Let's Get Started", key="start_button"):
-            st.session_state.show_intro = False
-            st.rerun()
+@st.fragment
+@profiled("chat_input")
+def render_chat_input():
+    for notice in st.session_state.pop("turn_notices", []):
+        render_notice(notice)
 
-    # Chat interface
-    if not st.session_state.show_intro:
-        st.markdown("""
-        <div style="background-color: #fff; padding: 20px; border-radius: 10px; margin-bottom: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
-            <h2 style="color: #0083B8; margin-top: 0;">Extraction Chat</h2>
-            <p>Ask questions about the website to extract specific data</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        chat_container = st.container(height=400)
-        with chat_container:
-            for message in st.session_state.messages:
-                show_chat_message(message["content"], message["role"] == "user")
-        
-        # Chat input and example button
-        st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
-        
-        example_prompt = add_example_button()
-        
-        prompt_placeholder = "Ask about the website... (e.g., 'Extract all product names and prices')"
-        if hasattr(st.session_state, 'example_prompt'):
-            prompt_placeholder = st.session_state.example_prompt
-        
-        if prompt := st.chat_input(prompt_placeholder):
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            
-            with chat_container:
-                show_chat_message(prompt, is_user=True)
-            
-            with chat_container:
-                # Get website URL from the sidebar
-                website_url = st.session_state.get("website_url", "")
-                
-                if not website_url:
-                    st.error("⚠️ Please enter a website URL in the sidebar first!")
-                elif not (website_url.startswith('http://') or website_url.startswith('https://')):
-                    st.error("⚠️ Please enter a valid URL starting with http:// or https://")
-                else:
-                    try:
-                        # Use animated loading
-                        loading_container, progress_bar = animated_loading("Extracting data from website...")
-                        
-                        app = load_app()
-                        schema = create_schema_from_fields(st.session_state.schema_fields)
-                        
-                        extract_params = {
-                            'prompt': prompt,
-                            'max_results': 20
-                        }
-                        if schema:
-                            extract_params['schema'] = schema
-                            
-                        data = app.extract(
-                            [website_url],
-                            extract_params
-                        )
-                        
-                        # Clear loading indicators
-                        loading_container.empty()
-                        progress_bar.empty()
-                        
-                        formatted_result = format_extraction_result(data)
-                                                
-                        # Increment extraction count
-                        st.session_state.extraction_count += 1
-                                                
-                        # Display formatted result with animation
-                        show_chat_message(formatted_result)
-                        st.session_state.messages.append({"role": "assistant", "content": formatted_result})
-                        
-                        # Show extraction stats
-                        st.success(f"✅ Extraction #{st.session_state.extraction_count} completed successfully!")
-                    
-                    except Exception as e:
-                        error_details = traceback.format_exc()
-                        st.error(f"❌ An error occurred: {str(e)}")
-                        with st.expander("Error Details"):
-                            st.code(error_details)
-
-with right_col:
-    # Sidebar configuration
-    st.markdown("""
-    <div style="background-color: #fff; padding: 20px; border-radius: 10px; margin-bottom: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
-        <h2 style="color: #0083B8; margin-top: 0;">Configuration</h2>
-        <p>Set up your extraction parameters</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Website URL input with enhanced styling
-    st.markdown("""
-    <div style="margin-bottom: 15px;">
-        <label style="font-weight: 600; color: #333; margin-bottom: 5px; display: block;">Website URL</label>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    website_url = st.text_input(
-        label="",
-        value=st.session_state.get("website_url", ""),
-        placeholder="https://example.com",
-        key="website_url"
+    # Chat input and example button
+    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
+
+    example_prompt = add_example_button()
+
+    prompt_placeholder = "Ask about the website... (e.g., 'Extract all product names and prices')"
+    if hasattr(st.session_state, 'example_prompt'):
+        prompt_placeholder = st.session_state.example_prompt
+
+    if prompt := st.chat_input(prompt_placeholder, disabled="active_job" in st.session_state):
+        st.session_state.messages.append({"role": "user", "content": prompt})
+        show_chat_message(prompt, is_user=True)
+
+        st.session_state.turn_notices = run_extraction_turn(prompt)
+        # Full rerun so the chat history and the Stats panel pick up the new result
+        st.rerun()
+
+def start_export(content, index, fmt):
+    """Write a result to a file under EXPORT_DIR on an export thread. Returns its state for export_file."""
+    import uuid
+    from firecrawl_scraper.export import export_result
+
+    # An unguessable directory per export: static files are served to anyone with the link
+    token = uuid.uuid4().hex
+    name = f"firecrawl-result-{index}.{fmt}"
+    path = EXPORT_DIR / token / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    export = {"index": index, "format": fmt, "path": str(path), "url": f"{EXPORT_URL}/{token}/{name}", "bytes": 0}
+    export["future"] = load_export_pool().submit(
+        export_result, content, fmt, path, progress=lambda nbytes: export.update(bytes=nbytes)
     )
-    
-    # Add URL validation tooltip
-    if website_url and not (website_url.startswith('http://') or website_url.startswith('https://')):
-        st.warning("URL must start with http:// or https://")
-    
-    st.markdown("<hr style='margin: 20px 0;'>", unsafe_allow_html=True)
-    
+    return export
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_export_progress():
+    """Show how far the running export is; a full rerun swaps in the download link once it is written."""
+    export = st.session_state.get("export_file")
+    if export is None or export["future"].done():
+        st.rerun()
+    st.caption(f"Writing {export['format'].upper()}... {export['bytes'] / 1024:.0f} KB")
+
+@st.fragment
+@profiled("export")
+def render_export_panel():
+    """Stream a stored result to a file on disk, then link to it for download."""
+    from firecrawl_scraper.columnar import table_num_rows
+    from firecrawl_scraper.export import EXPORT_FORMATS
+
+    history = st.session_state.messages
+    indices = history.result_indices()
+    if not indices:
+        return
+
+    def describe(index):
+        content = history[index]["content"]
+        rows = content.num_rows if isinstance(content, (SpilledResult, ExpiredResult)) else table_num_rows(content)
+        return f"Result #{indices.index(index) + 1} ({rows} rows)"
+
+    with st.expander("⬇️ Export results"):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            index = st.selectbox("Result", options=indices[::-1], format_func=describe, key="export_index")
+        with col2:
+            fmt = st.selectbox("Format", options=list(EXPORT_FORMATS), key="export_format")
+
+        export = st.session_state.get("export_file")
+        running = export is not None and not export["future"].done()
+        # Export to a file chunk by chunk, so the result is never rendered whole in memory
+        if st.button("Prepare download", use_container_width=True, disabled=running):
+            export = st.session_state.export_file = start_export(history[index]["content"], index, fmt)
+            running = True
+
+        if running:
+            render_export_progress()
+        elif export and export["index"] == index and export["format"] == fmt:
+            if export["future"].exception() is not None:
+                st.error(f"❌ Export failed: {export['future'].exception()}")
+            elif os.path.exists(export["path"]):
+                # A plain link: the browser fetches the file from disk, it never passes through the session
+                st.markdown(
+                    f'<a href="{export["url"]}" download="{Path(export["path"]).name}">'
+                    f'Download {fmt.upper()} ({export["future"].result() / 1024:.0f} KB)</a>',
+                    unsafe_allow_html=True
+                )
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+@profiled("active_job")
+def render_active_job():
+    """Poll the attached job, showing its progress and rows so far; hand the result to the chat when it finishes.
+
+    Each run polls once and returns, so it never holds up other fragments; run_every
+    brings the next poll. Rows of pages that finished since the last poll are added
+    to the live chunks kept in job_progress; a fragment run clears whatever it does
+    not draw, so every chunk is drawn, but only the last one's bytes ever change.
+    """
+    store = load_jobs().store
+    st.session_state.messages.touch()
+    job = store.get(st.session_state.active_job)
+    if job is None:
+        detach_job()
+        st.rerun()
+
+    progress = st.session_state.get("job_progress")
+    if progress is None or progress["id"] != job["id"] or progress["attempt"] != job["attempt"]:
+        if progress is not None and progress["id"] == job["id"]:
+            logger.info(f"Job {job['id'][:8]} was requeued (attempt {job['attempt']}), starting its progress over")
+            st.session_state.messages.report("live_table", 0)
+        progress = st.session_state.job_progress = new_job_progress(job)
+    if job["done"] > progress["seen"]:
+        collect_results(progress, store.results(job["id"], since=progress["seen"]))
+
+    if job["status"] in ("completed", "failed"):
+        finish_job(job, progress)
+        # Full rerun so the chat history and the Stats panel pick up the new result
+        st.rerun()
+
+    elapsed = time.time() - (job["started_at"] or job["created_at"])
+    # Set by the worker: the rate-limit queue position, or the Firecrawl extract job's own status
+    detail = job.get("detail")
+    if job["status"] == "queued":
+        message, fraction = "Waiting for a free worker...", 0.0
+    elif job["total"] is None:
+        message, fraction = f"Discovering pages ({elapsed:.0f}s elapsed)...", 0.0
+    elif job["total"] == 1:
+        # Firecrawl reports no percentage for extract jobs, so the bar only estimates from elapsed time
+        message, fraction = detail or f"Extraction is starting ({elapsed:.0f}s elapsed)...", estimate_progress(elapsed) / 100
+    else:
+        message, fraction = f"{job['done']}/{job['total']} URLs finished ({elapsed:.0f}s elapsed)", job["done"] / max(1, job["total"])
+        if detail:
+            message += f" · {detail}"
+    if progress["first_row_seconds"] is not None:
+        message += f" · first rows after {progress['first_row_seconds']:.1f}s"
+    st.markdown(f"<div style='display: flex; align-items: center;'><div class='loading-animation'></div><div style='margin-left: 10px;'>{message}</div></div>", unsafe_allow_html=True)
+    st.progress(fraction)
+    for chunk in live_chunks(progress):
+        st.dataframe(chunk, use_container_width=True, hide_index=True)
+    if progress["statuses"] and (job["total"] or 0) > 1:
+        import pandas as pd
+        with st.expander(f"Per-URL status ({len(progress['statuses'])}/{job['total']})"):
+            st.dataframe(pd.DataFrame(progress["statuses"]), use_container_width=True, hide_index=True)
+
+@st.fragment
+@profiled("schema")
+def render_schema_builder():
     # Schema Builder with attractive styling
     st.markdown("""
     <div style="margin-bottom: 15px;">
@@ -737,19 +746,19 @@ with right_col:
         <p style="color: #555; margin-bottom: 15px;">Define fields to extract from the website</p>
     </div>
     """, unsafe_allow_html=True)
-    
+
     # Schema controls
     col1, col2 = st.columns(2)
     with col1:
         if len(st.session_state.schema_fields) > 1 and st.button("🗑️ Remove Field", use_container_width=True):
             st.session_state.schema_fields.pop()
-            st.rerun()
-    
+            st.rerun(scope="fragment")
+
     with col2:
         if len(st.session_state.schema_fields) < 10 and st.button("➕ Add Field", use_container_width=True):
             st.session_state.schema_fields.append({"name": "", "type": "str"})
-            st.rerun()
-    
+            st.rerun(scope="fragment")
+
     # Dynamic schema fields
     for i, field in enumerate(st.session_state.schema_fields):
         st.markdown(f"""
@@ -757,9 +766,9 @@ with right_col:
             <p style="margin: 0; padding: 0; font-weight: 600; color: #0083B8;">Field #{i+1}</p>
         </div>
         """, unsafe_allow_html=True)
-        
+
         col1, col2 = st.columns([2, 1])
-        
+
         with col1:
             field["name"] = st.text_input(
                 "Name",
@@ -767,7 +776,7 @@ with right_col:
                 key=f"name_{i}",
                 placeholder="e.g., title, price, url"
             )
-        
+
         with col2:
             field["type"] = st.selectbox(
                 "Type",
@@ -775,36 +784,247 @@ with right_col:
                 key=f"type_{i}",
                 index=0 if field["type"] == "str" else ["str", "bool", "int", "float"].index(field["type"])
             )
-    
-    st.markdown("<hr style='margin: 20px 0;'>", unsafe_allow_html=True)
-    
-    # Reset buttons
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("🔄 Reset Schema", use_container_width=True):
-            st.session_state.schema_fields = [{"name": "", "type": "str"}]
-            st.rerun()
-    
-    with col2:
+
+    if st.button("🔄 Reset Schema", use_container_width=True):
+        st.session_state.schema_fields = [{"name": "", "type": "str"}]
+        st.rerun(scope="fragment")
+
+# ===========================
+#   Main Chat Interface
+# ===========================
+@profiled("script")
+def main():
+    st.set_page_config(
+            page_title="Firecrawl Web Scraper",
+            page_icon="🕸️",
+            layout="wide",
+            initial_sidebar_state="expanded"
+        )
+
+    # Apply custom CSS
+    apply_custom_css()
+
+    init_session_state()
+
+    # Main interface columns
+    left_col, right_col = st.columns([2, 1])
+
+    with left_col:
+        render_logo()
+
+        if st.session_state.show_intro:
+            st.markdown("""
+            <div style="background-color: #f0f7ff; padding: 20px; border-radius: 10px; margin-bottom: 20px;">
+                <h2 style="color: #0083B8; margin-top: 0;">Extract Data from Any Website</h2>
+                <p>This app uses AI to convert websites into structured data. Simply:</p>
+                <ol>
+                    <li><b>Enter a website URL</b> in the sidebar</li>
+                    <li><b>Define a schema</b> (optional) or use our default extraction</li>
+                    <li><b>Ask a question</b> about what you want to extract</li>
+                </ol>
+                <p>Try prompts like "Extract all product prices" or "Get all article titles and authors"</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            render_feature_cards()
+
+            if st.button("Let's Get Started", key="start_button"):
+                st.session_state.show_intro = False
+                st.rerun()
+
+        # Chat interface
+        if not st.session_state.show_intro:
+            st.markdown("""
+            <div style="background-color: #fff; padding: 20px; border-radius: 10px; margin-bottom: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
+                <h2 style="color: #0083B8; margin-top: 0;">Extraction Chat</h2>
+                <p>Ask questions about the website to extract specific data</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            render_chat_history()
+            if "active_job" in st.session_state:
+                render_active_job()
+            render_chat_input()
+            render_export_panel()
+
+    with right_col:
+        # Sidebar configuration
+        st.markdown("""
+        <div style="background-color: #fff; padding: 20px; border-radius: 10px; margin-bottom: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
+            <h2 style="color: #0083B8; margin-top: 0;">Configuration</h2>
+            <p>Set up your extraction parameters</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # Website URL input with enhanced styling
+        st.markdown("""
+        <div style="margin-bottom: 15px;">
+            <label style="font-weight: 600; color: #333; margin-bottom: 5px; display: block;">Website URL</label>
+        </div>
+        """, unsafe_allow_html=True)
+
+        website_url = st.text_input(
+            label="",
+            value=st.session_state.get("website_url", ""),
+            placeholder="https://example.com",
+            key="website_url"
+        )
+
+        # Add URL validation tooltip
+        if website_url and not (website_url.startswith('http://') or website_url.startswith('https://')):
+            st.warning("URL must start with http:// or https://")
+
+        extraction_mode = st.radio(
+            "Mode",
+            options=["Single URL", "Batch", "Crawl"],
+            key="extraction_mode",
+            horizontal=True,
+            help="Batch runs the same prompt and schema against many URLs; Crawl discovers the pages under the website URL first"
+        )
+
+        if extraction_mode == "Batch":
+            st.text_area(
+                "URLs",
+                key="batch_urls",
+                placeholder="https://example.com/a\nhttps://example.com/b",
+                height=120
+            )
+            st.file_uploader("...or upload a CSV with a url column", type=["csv"], key="batch_csv")
+            st.slider(
+                "Concurrent extractions",
+                min_value=1,
+                max_value=16,
+                value=DEFAULT_CONCURRENCY,
+                key="batch_concurrency"
+            )
+        elif extraction_mode == "Crawl":
+            st.text_input(
+                "Include paths",
+                key="crawl_include",
+                placeholder="/blog/*, /projects/*",
+                help="Only extract pages whose path matches one of these patterns. A wildcard website URL (https://site.com/blog/*) works too."
+            )
+            st.text_input("Exclude paths", key="crawl_exclude", placeholder="/tag/*, /login")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.slider("Max depth", min_value=0, max_value=5, value=DEFAULT_CRAWL_DEPTH, key="crawl_depth")
+            with col2:
+                st.number_input("Max pages", min_value=1, max_value=1000, value=DEFAULT_CRAWL_PAGES, key="crawl_pages")
+            st.slider(
+                "Concurrent extractions",
+                min_value=1,
+                max_value=16,
+                value=DEFAULT_CONCURRENCY,
+                key="batch_concurrency"
+            )
+
+        st.markdown("<hr style='margin: 20px 0;'>", unsafe_allow_html=True)
+
+        render_schema_builder()
+
+        st.markdown("<hr style='margin: 20px 0;'>", unsafe_allow_html=True)
+
+        st.checkbox(
+            "Only show changes",
+            key="changes_only",
+            help="Skip pages that have not changed since the last run with this prompt and schema, and show only added, removed or changed rows"
+        )
+
+        st.checkbox(
+            "Local fast path",
+            key="local_first",
+            value=LOCAL_FIRST,
+            help="For simple text schemas (titles, descriptions, links) and prompts that ask for nothing more, try pulling rows out of the page's tables, headings and link lists before calling the remote extract"
+        )
+
+        st.checkbox(
+            "Bypass cache",
+            key="bypass_cache",
+            help="Always call Firecrawl, even if this URL, prompt and schema were extracted recently"
+        )
+
+        # Hidden unless profiling is on server-wide or the URL has ?profile=1
+        if PROFILE_ENABLED or "profile" in st.query_params:
+            st.toggle(
+                "🔬 Profile reruns",
+                key="profiling",
+                value=PROFILE_ENABLED,
+                help="Sample every rerun and extraction turn; profiles take effect from the next rerun"
+            )
+            render_profiles()
+
         if st.button("🗑️ Reset Chat", use_container_width=True):
             reset_chat()
             st.session_state.extraction_count = 0
             st.rerun()
-    
-    # Stats and info
-    if st.session_state.extraction_count > 0:
-        st.markdown(f"""
-        <div style="background-color: #f0f7ff; padding: 15px; border-radius: 8px; margin-top: 20px;">
-            <h4 style="margin-top: 0; color: #0083B8;">Stats</h4>
-            <p>📊 Extractions: {st.session_state.extraction_count}</p>
-            <p>🔍 Current Website: {website_url[:30] + '...' if len(website_url) > 30 else website_url or 'None'}</p>
-        </div>
-        """, unsafe_allow_html=True)
 
-# Footer
-st.markdown("""
-<div class="footer">
-    <p>Built with ❤️ by raqibcodes</p>
-    <p>© 2025 Web Scraping Technologies</p>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+        # Stats and info
+        if st.session_state.extraction_count > 0:
+            history_stats = st.session_state.messages.stats()
+            limiter_stats = load_limiter().stats(st.session_state.messages.session_id)
+            job_counts = load_jobs().store.counts()
+            session_stats = load_sessions().stats()
+            run_timings = st.session_state.get("run_timings", {"first_paint_ms": None, "last_rerun_ms": None})
+            # Server-wide p50 / p95 per stage of a turn, in the order a turn goes through them
+            stage_stats = METRICS.summary()
+            latency_lines = "".join(
+                f"<p>⏱️ {stage}: {format_seconds(stage_stats[stage]['p50'])} / {format_seconds(stage_stats[stage]['p95'])} (n={stage_stats[stage]['count']})</p>"
+                for stage in LATENCY_STAGES if stage in stage_stats
+            )
+            st.markdown(f"""
+            <div style="background-color: #f0f7ff; padding: 15px; border-radius: 8px; margin-top: 20px;">
+                <h4 style="margin-top: 0; color: #0083B8;">Stats</h4>
+                <p>📊 Extractions: {st.session_state.extraction_count}</p>
+                <p>💾 Results in memory / on disk: {history_stats['in_memory']} ({history_stats['in_memory_bytes'] / 1024:.0f} KB) / {history_stats['spilled']}</p>
+                <p>🧠 Server memory: {session_stats['bytes'] / 1024 / 1024:.1f} / {session_stats['budget_bytes'] / 1024 / 1024:.0f} MB across {session_stats['sessions']} sessions ({session_stats['idle']} idle, {session_stats['compacted']} compacted, {session_stats['expired']} expired)</p>
+                <p>🔍 Current Website: {website_url[:30] + '...' if len(website_url) > 30 else website_url or 'None'}</p>
+                <p>⏱️ First paint / last rerun: {run_timings['first_paint_ms'] or 0:.0f}ms / {run_timings['last_rerun_ms'] or 0:.0f}ms</p>
+                <p>🚦 Queue position: {limiter_stats['queue_position'] or '-'} ({limiter_stats['waiting']} calls waiting server-wide)</p>
+                <p>🧵 Jobs queued / running: {job_counts['queued']} / {job_counts['running']}</p>
+                <p>💳 Credits left: {limiter_stats['session_remaining']:.0f} this session / {limiter_stats['global_remaining']:.0f} server-wide</p>
+                <h4 style="color: #0083B8;">Latency p50 / p95</h4>
+                {latency_lines or "<p>No turns measured yet</p>"}
+            </div>
+            """, unsafe_allow_html=True)
+
+        cache_stats = load_cache().stats()
+        page_stats = load_pages().stats()
+        flight_stats = SINGLE_FLIGHT.stats()
+        if cache_stats["hits"] + cache_stats["misses"] + page_stats["misses"] > 0:
+            st.markdown(f"""
+            <div style="background-color: #f0f7ff; padding: 15px; border-radius: 8px; margin-top: 20px;">
+                <h4 style="margin-top: 0; color: #0083B8;">Cache</h4>
+                <p>⚡ Hits / misses: {cache_stats['hits']} / {cache_stats['misses']} ({cache_stats['hit_rate']:.0%})</p>
+                <p>⏱️ Time saved: {cache_stats['saved_seconds']:.1f}s</p>
+                <p>💳 Extract calls saved: {cache_stats['hits'] + flight_stats['coalesced']}</p>
+                <p>🔗 Coalesced with in-flight calls: {flight_stats['coalesced']} ({flight_stats['coalesce_rate']:.0%}), {flight_stats['in_flight']} running</p>
+                <p>🗄️ Entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.0f} KB)</p>
+                <p>📄 Pages reused / revalidated / fetched: {page_stats['hits']} / {page_stats['revalidated']} / {page_stats['misses']} ({page_stats['entries']} pages, {page_stats['bytes'] / 1024:.0f} KB)</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+    # Footer
+    st.markdown("""
+    <div class="footer">
+        <p>Built with ❤️ by raqibcodes</p>
+        <p>© 2025 Web Scraping Technologies</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    record_run_timing()
+
+def record_run_timing():
+    """Record time to first paint and the cost of the latest full rerun for this session."""
+    elapsed_ms = (time.perf_counter() - _run_started) * 1000
+    timings = st.session_state.setdefault("run_timings", {"first_paint_ms": None, "last_rerun_ms": None, "reruns": 0})
+    if timings["first_paint_ms"] is None:
+        timings["first_paint_ms"] = elapsed_ms
+        logger.info(f"First paint after {elapsed_ms:.1f}ms")
+    else:
+        timings["reruns"] += 1
+        timings["last_rerun_ms"] = elapsed_ms
+        logger.debug(f"Rerun #{timings['reruns']} took {elapsed_ms:.1f}ms")
+
+# Streamlit runs this file as __main__; importing it (e.g. from benchmarks) renders nothing
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""End-to-end chat-turn latency against the local fake Firecrawl server.
+
+Drives app.py through Streamlit's AppTest with FirecrawlApp pointed at
+benchmarks/fake_firecrawl.py, so the measured time is the app's own overhead
+on top of a known, simulated extraction latency.
+
+    python benchmarks/bench_chat_turn.py [--turns 5] [--latency 0.5] [--rows 50] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_firecrawl import FakeConfig, start_server
+
+
+def configure_environment(server_url, workdir):
+    """Point the app at the fake server and keep caches/spill files out of the repo."""
+    os.environ["FIRECRAWL_API_URL"] = server_url
+    os.environ["FIRECRAWL_API_KEY"] = "bench"
+    os.environ.setdefault("FIRECRAWL_POLL_INTERVAL", "0.1")
+    # Only effective before firecrawl_scraper is first imported in this process
+    os.environ.setdefault("FIRECRAWL_CACHE_PATH", str(Path(workdir) / "extractions.sqlite3"))
+    os.environ.setdefault("FIRECRAWL_HISTORY_DIR", str(Path(workdir) / "history"))
+    os.environ.setdefault("FIRECRAWL_SNAPSHOT_PATH", str(Path(workdir) / "snapshots.sqlite3"))
+    os.environ.setdefault("FIRECRAWL_JOBS_PATH", str(Path(workdir) / "jobs.sqlite3"))
+    os.environ.setdefault("FIRECRAWL_PAGE_CACHE_PATH", str(Path(workdir) / "pages.sqlite3"))
+    os.environ.setdefault("FIRECRAWL_RATELIMIT_PATH", str(Path(workdir) / "ratelimit.sqlite3"))
+
+
+def run_turn(at, prompt, poll_interval=0.02):
+    """Submit a prompt and rerun until the background job's result lands in the chat.
+
+    The browser polls every JOB_POLL_INTERVAL; polling faster here measures the
+    job itself rather than the poll cadence.
+    """
+    at.chat_input[0].set_value(prompt).run()
+    while "active_job" in at.session_state:
+        time.sleep(poll_interval)
+        at.run()
+
+
+def bench(turns=5, latency=0.5, rows=50, error_rate=0.0):
+    from streamlit.testing.v1 import AppTest
+
+    server = start_server(FakeConfig(latency=latency, rows=rows, error_rate=error_rate))
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            configure_environment(server.url, workdir)
+            at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+            at.session_state["show_intro"] = False
+            at.session_state["bypass_cache"] = True
+            at.session_state["website_url"] = "https://example.com"
+            at.run()
+
+            timings = []
+            errors = 0
+            for turn in range(turns):
+                started = time.perf_counter()
+                run_turn(at, f"Extract all items ({turn})")
+                timings.append(time.perf_counter() - started)
+                errors += len(at.error)
+    finally:
+        server.shutdown()
+
+    timings.sort()
+    return {
+        "turns": turns,
+        "server_latency_ms": latency * 1000,
+        "rows_per_turn": rows,
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+        "median_overhead_ms": round((statistics.median(timings) - latency) * 1000, 2),
+        "errors": errors,
+        "server_requests": server.stats.requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    result = bench(args.turns, args.latency, args.rows, args.error_rate)
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"benchmark": "chat_turn", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
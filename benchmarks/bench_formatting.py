@@ -0,0 +1,72 @@
+"""Throughput of result formatting on large extraction payloads.
+
+Times format_extraction_result (with schema coercion), to_arrow_table and
+convert_to_table on synthetic payloads shaped like Firecrawl extract results.
+
+    python benchmarks/bench_formatting.py [--rows 10000 100000 1000000] [--json out.json]
+"""
+import argparse
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_firecrawl import make_rows
+from firecrawl_scraper.columnar import to_arrow_table
+from firecrawl_scraper.core import convert_to_table, format_extraction_result
+
+FIELDS = [
+    {"name": "title", "type": "str"},
+    {"name": "description", "type": "str"},
+    {"name": "link", "type": "str"},
+]
+
+# Markdown rendering of a million rows is not a realistic chat payload
+CONVERT_TO_TABLE_MAX_ROWS = 100_000
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def bench(rows):
+    payload = {"success": True, "data": {"projects": make_rows("https://example.com", rows, 40)}}
+    result = {"rows": rows}
+
+    frame, seconds = timed(format_extraction_result, payload, FIELDS)
+    result["format_extraction_result_rows_per_s"] = round(rows / seconds)
+
+    _, seconds = timed(to_arrow_table, frame, FIELDS)
+    result["to_arrow_table_rows_per_s"] = round(rows / seconds)
+
+    if rows > CONVERT_TO_TABLE_MAX_ROWS:
+        result["convert_to_table_rows_per_s"] = None
+    elif importlib.util.find_spec("tabulate") is None:
+        result["convert_to_table_rows_per_s"] = "skipped: tabulate not installed"
+    else:
+        _, seconds = timed(convert_to_table, payload["data"]["projects"])
+        result["convert_to_table_rows_per_s"] = round(rows / seconds)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = [bench(rows) for rows in args.rows]
+    for row in results:
+        print(row)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"benchmark": "formatting", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
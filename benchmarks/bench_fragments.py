@@ -0,0 +1,115 @@
+"""Rerun cost of a schema-builder edit versus chat history length.
+
+Before the UI was split into fragments every schema edit reran the whole
+script, rebuilding every chat message and dataframe. For growing histories
+this times, against app.py itself, a plain rerun and an edit of a schema
+field name, and then the schema builder fragment's body on its own.
+
+Streamlit's AppTest has no fragment-scoped reruns: a widget edit always
+reruns the whole script, so the "schema edit" column is what the edit cost
+before fragments, not after. The "schema fragment" column runs just
+init_session_state() and render_schema_builder() in a standalone script,
+which is the work a fragment rerun does in the browser, minus Streamlit's
+own per-rerun overhead.
+
+    python benchmarks/bench_fragments.py [--lengths 0 10 50 200] [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("FIRECRAWL_API_KEY", "bench")
+
+import pyarrow as pa
+from streamlit.testing.v1 import AppTest
+
+from firecrawl_scraper.history import ChatHistory
+
+
+def schema_fragment_script():
+    import app
+
+    app.init_session_state()
+    app.render_schema_builder()
+
+
+def make_history(length, rows=50):
+    # Keep everything in memory so the full rerun renders every table, as before spilling
+    history = ChatHistory(max_in_memory=length + 1, max_bytes=1 << 40)
+    table = pa.table({
+        "title": [f"Title {i}" for i in range(rows)],
+        "link": [f"https://example.com/{i}" for i in range(rows)],
+    })
+    for i in range(length // 2):
+        history.append({"role": "user", "content": f"prompt {i}"})
+        history.append({"role": "assistant", "content": table})
+    return history
+
+
+def time_runs(at, repeat):
+    at.run()  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def time_schema_edits(at, repeat):
+    at.run()
+    timings = []
+    for i in range(repeat):
+        field = at.text_input(key="name_0")
+        started = time.perf_counter()
+        field.input(f"field_{i}").run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def app_test(length):
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+    at.session_state["messages"] = make_history(length)
+    at.session_state["show_intro"] = False
+    return at
+
+
+def bench(length, repeat):
+
+    fragment = AppTest.from_function(schema_fragment_script, default_timeout=60)
+    fragment.session_state["messages"] = make_history(length)
+
+    return {
+        "history_length": length,
+        "full_rerun_ms": round(time_runs(app_test(length), repeat) * 1000, 2),
+        "schema_edit_full_rerun_ms": round(time_schema_edits(app_test(length), repeat) * 1000, 2),
+        "schema_fragment_rerun_ms": round(time_runs(fragment, repeat) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    results = [bench(length, args.repeat) for length in args.lengths]
+
+    print(f"{'history':>8} {'full rerun (ms)':>16} {'schema edit (ms)':>17} {'schema fragment (ms)':>21}")
+    for row in results:
+        print(f"{row['history_length']:>8} {row['full_rerun_ms']:>16} {row['schema_edit_full_rerun_ms']:>17} "
+              f"{row['schema_fragment_rerun_ms']:>21}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"benchmark": "fragments", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
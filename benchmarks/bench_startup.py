@@ -0,0 +1,81 @@
+"""Cold start and per-rerun cost of the Streamlit app.
+
+Measures, in a fresh interpreter, how long importing app.py takes (what a new
+server process pays before the first paint), then the first AppTest run of a
+session and the median cost of a full rerun.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+import sys
+heavy = sorted(m for m in ("pandas", "pyarrow", "pydantic", "firecrawl") if m in sys.modules)
+print(elapsed, ",".join(heavy))
+"""
+
+
+def cold_import(repeat):
+    env = {**os.environ, "FIRECRAWL_API_KEY": os.environ.get("FIRECRAWL_API_KEY", "bench")}
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(out[0]))
+    return statistics.median(timings), out[1] if len(out) > 1 else ""
+
+
+def app_runs(repeat):
+    os.environ.setdefault("FIRECRAWL_API_KEY", "bench")
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+    started = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - started
+    reruns = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - started)
+    return first, statistics.median(reruns), at.session_state["run_timings"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    import_seconds, heavy = cold_import(args.repeat)
+    first, rerun, recorded = app_runs(args.repeat)
+    result = {
+        "cold_import_ms": round(import_seconds * 1000, 2),
+        "heavy_modules_at_import": heavy.split(",") if heavy else [],
+        "first_run_ms": round(first * 1000, 2),
+        "rerun_ms": round(rerun * 1000, 2),
+        "app_recorded_first_paint_ms": round(recorded["first_paint_ms"], 2),
+    }
+    for key, value in result.items():
+        print(f"{key:>30}: {value}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"benchmark": "startup", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
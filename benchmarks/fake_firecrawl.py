@@ -0,0 +1,195 @@
+"""Local stand-in for the Firecrawl HTTP API, for benchmarks that must not spend credits.
+
+Implements the endpoints the app uses (extract + status, scrape, map) with
+configurable latency, payload size and error rates. Point FirecrawlApp at it
+with FIRECRAWL_API_URL:
+
+    python benchmarks/fake_firecrawl.py --port 3002 --latency 2 --rows 50
+    FIRECRAWL_API_URL=http://127.0.0.1:3002 FIRECRAWL_API_KEY=fake streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+@dataclass
+class FakeConfig:
+    latency: float = 1.0          # seconds an extract job stays "processing"
+    request_latency: float = 0.0  # added to every HTTP response
+    rows: int = 20                # rows per extract result
+    field_size: int = 40          # characters per text field
+    error_rate: float = 0.0       # fraction of job submissions answered with HTTP 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with HTTP 429
+    retry_after: float = 1.0      # Retry-After seconds sent with 429s
+    seed: int = 0
+
+
+@dataclass
+class FakeStats:
+    requests: int = 0
+    connections: int = 0
+    extract_jobs: int = 0
+    scrapes: int = 0
+    maps: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+
+def make_rows(url, rows, field_size):
+    filler = ("lorem ipsum dolor sit amet " * (field_size // 27 + 1))[:field_size]
+    return [
+        {"title": f"Item {i}", "description": filler, "link": f"{url.rstrip('/*')}/item/{i}"}
+        for i in range(rows)
+    ]
+
+
+class FakeFirecrawlServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeConfig):
+        super().__init__(address, FakeFirecrawlHandler)
+        self.config = config
+        self.stats = FakeStats()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeFirecrawlHandler(BaseHTTPRequestHandler):
+    server: FakeFirecrawlServer
+    # Keep-alive like the real API, so connection reuse by the client is measurable
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stats.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _preamble(self):
+        """Count the request, apply latency and maybe answer with a 429. Returns True if handled."""
+        server, config = self.server, self.server.config
+        with server.lock:
+            server.stats.requests += 1
+            endpoint = f"{self.command} " + "/".join(self.path.split("?")[0].split("/")[:3])
+            server.stats.by_path[endpoint] = server.stats.by_path.get(endpoint, 0) + 1
+            limited = server.random.random() < config.rate_limit_rate
+            if limited:
+                server.stats.rate_limited += 1
+        if config.request_latency:
+            time.sleep(config.request_latency)
+        if limited:
+            self._send(429, {"success": False, "error": "Rate limit exceeded"},
+                       {"Retry-After": f"{config.retry_after:g}"})
+        return limited
+
+    def do_POST(self):
+        if self._preamble():
+            return
+        server, config = self.server, self.server.config
+        body = self._body()
+        if self.path == "/v1/extract":
+            with server.lock:
+                failed = server.random.random() < config.error_rate
+                if failed:
+                    server.stats.errors += 1
+                else:
+                    server.stats.extract_jobs += 1
+            if failed:
+                return self._send(500, {"success": False, "error": "Injected failure"})
+            job_id = str(uuid.uuid4())
+            with server.lock:
+                server.jobs[job_id] = (time.monotonic(), body.get("urls") or [""])
+            return self._send(200, {"success": True, "id": job_id})
+        if self.path == "/v1/scrape":
+            with server.lock:
+                server.stats.scrapes += 1
+            url = body.get("url", "")
+            rows = make_rows(url, config.rows, config.field_size)
+            markdown = "\n\n".join(f"## {r['title']}\n\n{r['description']}\n\n[Read more]({r['link']})" for r in rows)
+            return self._send(200, {"success": True, "data": {
+                "markdown": f"# {url}\n\n{markdown}",
+                "links": [r["link"] for r in rows],
+                "metadata": {"sourceURL": url, "statusCode": 200},
+            }})
+        if self.path == "/v1/map":
+            with server.lock:
+                server.stats.maps += 1
+            url = body.get("url", "").rstrip("/")
+            limit = int(body.get("limit") or config.rows)
+            return self._send(200, {"success": True, "links": [url] + [f"{url}/page/{i}" for i in range(limit - 1)]})
+        self._send(404, {"success": False, "error": f"Unknown endpoint {self.path}"})
+
+    def do_GET(self):
+        if self._preamble():
+            return
+        server, config = self.server, self.server.config
+        if self.path.startswith("/v1/extract/"):
+            job_id = self.path.rsplit("/", 1)[1]
+            with server.lock:
+                job = server.jobs.get(job_id)
+            if job is None:
+                return self._send(404, {"success": False, "error": "Job not found"})
+            started, urls = job
+            if time.monotonic() - started < config.latency:
+                return self._send(200, {"success": True, "status": "processing"})
+            rows = []
+            for url in urls:
+                rows += make_rows(url, config.rows, config.field_size)
+            return self._send(200, {"success": True, "status": "completed", "data": {"projects": rows}})
+        self._send(404, {"success": False, "error": f"Unknown endpoint {self.path}"})
+
+
+def start_server(config: FakeConfig = None, host="127.0.0.1", port=0) -> FakeFirecrawlServer:
+    """Start the fake API on a background thread; call server.shutdown() when done."""
+    server = FakeFirecrawlServer((host, port), config or FakeConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3002)
+    for name, default in vars(FakeConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+    config = FakeConfig(**{k: getattr(args, k) for k in vars(FakeConfig())})
+    server = FakeFirecrawlServer((args.host, args.port), config)
+    print(f"Fake Firecrawl API listening on {server.url} ({config})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
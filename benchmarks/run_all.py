@@ -0,0 +1,89 @@
+"""Run the whole benchmark suite and write one machine-readable results file.
+
+    python benchmarks/run_all.py [--quick] [--output benchmarks/results]
+
+Results land in <output>/<UTC timestamp>-<git sha>.json so runs can be diffed
+over time to catch regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Keep caches and spill files of every benchmark out of the working tree; must be
+# set before anything imports firecrawl_scraper.
+WORKDIR = tempfile.mkdtemp(prefix="firecrawl-bench-")
+os.environ.setdefault("FIRECRAWL_CACHE_PATH", str(Path(WORKDIR) / "extractions.sqlite3"))
+os.environ.setdefault("FIRECRAWL_HISTORY_DIR", str(Path(WORKDIR) / "history"))
+os.environ.setdefault("FIRECRAWL_SNAPSHOT_PATH", str(Path(WORKDIR) / "snapshots.sqlite3"))
+os.environ.setdefault("FIRECRAWL_JOBS_PATH", str(Path(WORKDIR) / "jobs.sqlite3"))
+os.environ.setdefault("FIRECRAWL_PAGE_CACHE_PATH", str(Path(WORKDIR) / "pages.sqlite3"))
+os.environ.setdefault("FIRECRAWL_RATELIMIT_PATH", str(Path(WORKDIR) / "ratelimit.sqlite3"))
+os.environ.setdefault("FIRECRAWL_API_KEY", "bench")
+
+
+def git_sha():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(quick):
+    from benchmarks import bench_chat_turn, bench_formatting, bench_fragments, bench_startup
+
+    results = {}
+    started = time.perf_counter()
+    results["formatting"] = [bench_formatting.bench(rows) for rows in
+                             ([10_000, 100_000] if quick else [10_000, 100_000, 1_000_000])]
+    results["chat_turn"] = bench_chat_turn.bench(turns=3 if quick else 10)
+    results["fragments"] = [bench_fragments.bench(length, 3) for length in
+                            ([0, 50] if quick else [0, 10, 50, 200])]
+    import_seconds, heavy = bench_startup.cold_import(3)
+    first, rerun, _ = bench_startup.app_runs(3 if quick else 5)
+    results["startup"] = {
+        "cold_import_ms": round(import_seconds * 1000, 2),
+        "heavy_modules_at_import": heavy.split(",") if heavy else [],
+        "first_run_ms": round(first * 1000, 2),
+        "rerun_ms": round(rerun * 1000, 2),
+    }
+    results["suite_seconds"] = round(time.perf_counter() - started, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--output", default=str(ROOT / "benchmarks" / "results"))
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sha = git_sha()
+    report = {
+        "git_sha": sha,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": run_suite(args.quick),
+    }
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{sha}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report["results"], indent=2))
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -72,14 +72,20 @@
 #==================================
 # Streamlit Cloud Implementation
 #==================================
-import streamlit as st
-
-try:
-    # GROQ_API_KEY = st.secrets.GROQ.API_KEY
-    FIRECRAWL_API_KEY = st.secrets.FIRECRAWL.API_KEY
-    # SERPER_API_KEY = st.secrets.SERPER.API_KEY
-except (ImportError, KeyError) as e:
-    raise RuntimeError(f"Missing configuration: {str(e)}") from e
+import os
+
+# Prefer the environment so headless workers and the CLI never import Streamlit
+FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
+
+if not FIRECRAWL_API_KEY:
+    import streamlit as st
+
+    try:
+        # GROQ_API_KEY = st.secrets.GROQ.API_KEY
+        FIRECRAWL_API_KEY = st.secrets.FIRECRAWL.API_KEY
+        # SERPER_API_KEY = st.secrets.SERPER.API_KEY
+    except (ImportError, KeyError) as e:
+        raise RuntimeError(f"Missing configuration: {str(e)}") from e
 
 __all__ = [
     'FIRECRAWL_API_KEY',
@@ -0,0 +1 @@
+"""Core extraction helpers shared by the Streamlit app."""
@@ -0,0 +1,5 @@
+import sys
+
+from firecrawl_scraper.cli import main
+
+sys.exit(main())
@@ -0,0 +1,88 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional
+
+from firecrawl_scraper.cache import ExtractionCache, make_cache_key
+from firecrawl_scraper.extraction import start_extraction
+from firecrawl_scraper.local import extract_page
+from firecrawl_scraper.pages import PageCache
+
+DEFAULT_CONCURRENCY = 4
+URL_COLUMNS = ("url", "urls", "website", "website_url", "link", "source_url")
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one URL in a batch run."""
+    url: str
+    data: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    cached: bool = False
+    # Set by incremental runs: the payload from the previous run, and whether the page was skipped as unchanged
+    previous: Any = None
+    unchanged: bool = False
+    # Extracted by the local engine from a scrape, without an extract call
+    local: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def parse_url_list(text: str) -> List[str]:
+    """Split pasted text (newline, comma or whitespace separated) into unique http(s) URLs."""
+    urls = [u for u in re.split(r"[\s,]+", text or "") if u.startswith(("http://", "https://"))]
+    return list(dict.fromkeys(urls))
+
+
+def read_urls_csv(file) -> List[str]:
+    """Read URLs from a CSV, using a url-like column if present, otherwise the first column."""
+    import pandas as pd
+
+    df = pd.read_csv(file, dtype=str)
+    column = next((c for c in df.columns if c.strip().lower() in URL_COLUMNS), df.columns[0])
+    return parse_url_list("\n".join(df[column].dropna()))
+
+
+def run_batch(app, urls: Iterable[str], extract_params: dict, max_workers: int = DEFAULT_CONCURRENCY,
+              cache: Optional[ExtractionCache] = None, use_cache: bool = True,
+              timeout: Optional[float] = None, local_first: bool = False,
+              pages: Optional[PageCache] = None) -> Iterator[BatchResult]:
+    """Extract the same prompt/schema from many URLs with at most max_workers jobs in flight.
+
+    Results are yielded in completion order, so a slow URL never holds back the
+    others. Failures (including timeouts) are reported per URL instead of raised.
+    With local_first, simple schemas are tried with the local engine before extract
+    (see local.extract_page), scraping through pages if given; local results are not
+    cached since they are cheap to redo from the cached page.
+    """
+    def extract_one(url):
+        started = time.monotonic()
+        key = make_cache_key(url, extract_params.get("prompt"), extract_params.get("schema"))
+        if cache is not None and use_cache:
+            data = cache.get(key)
+            if data is not None:
+                return BatchResult(url, data, elapsed=time.monotonic() - started, cached=True)
+        try:
+            if local_first:
+                data, local = extract_page(app, url, extract_params, timeout, pages=pages)
+            else:
+                data, local = start_extraction(app, [url], extract_params).result(timeout), False
+        except Exception as e:
+            return BatchResult(url, error=str(e), elapsed=time.monotonic() - started)
+        if cache is not None and not local:
+            cache.set(key, url, data, latency=time.monotonic() - started)
+        return BatchResult(url, data, elapsed=time.monotonic() - started, local=local)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="batch-extract") as pool:
+        futures = [pool.submit(extract_one, url) for url in urls]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # A consumer that stops early (e.g. a worker that lost its job) doesn't pay for the rest
+            for future in futures:
+                future.cancel()
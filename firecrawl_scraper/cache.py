@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_CACHE_PATH = os.getenv("FIRECRAWL_CACHE_PATH", ".cache/extractions.sqlite3")
+DEFAULT_TTL = float(os.getenv("FIRECRAWL_CACHE_TTL", 24 * 60 * 60))
+DEFAULT_MAX_BYTES = int(os.getenv("FIRECRAWL_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonicalize a URL so trivially different spellings share a cache entry.
+
+    Lowercases the scheme and host, drops default ports, fragments and a trailing
+    slash, and sorts query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def make_cache_key(url: str, prompt: str, schema: Optional[Dict[str, Any]]) -> str:
+    """Build a stable cache key from the normalized URL, prompt and schema JSON."""
+    canonical = json.dumps(
+        {
+            "url": normalize_url(url),
+            "prompt": re.sub(r"\s+", " ", (prompt or "").strip()),
+            "schema": hashlib.sha256(
+                json.dumps(schema, sort_keys=True, separators=(",", ":")).encode()
+            ).hexdigest(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ExtractionCache:
+    """Disk-backed (SQLite) cache for extract results with TTL and LRU size-bounded eviction.
+
+    Payloads are stored as zlib-compressed JSON. Hit/miss counters, together with
+    the latency of the original calls, are persisted so savings are visible across
+    sessions and restarts.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+        """)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached payload for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, latency, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bump(misses=1)
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._bump(hits=1, saved_seconds=row[1])
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, url: str, payload: Any, latency: float = 0.0) -> None:
+        """Store a payload and evict expired / least recently used entries over the size bound."""
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_url(url), blob, len(blob), latency, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def _bump(self, **deltas: float) -> None:
+        self._conn.executemany(
+            "INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            deltas.items(),
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counts, hit rate, seconds saved and current size."""
+        with self._lock:
+            values = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        hits = int(values.get("hits", 0))
+        misses = int(values.get("misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "saved_seconds": values.get("saved_seconds", 0.0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM stats")
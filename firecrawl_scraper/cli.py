@@ -0,0 +1,281 @@
+"""Headless command line entry point.
+
+Runs the same extraction pipeline as the Streamlit app without importing
+Streamlit, e.g.::
+
+    python -m firecrawl_scraper extract --urls urls.txt --prompt "..." --schema fields.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def load_schema(path):
+    """Load a schema file: either a list of {"name", "type"} fields or a ready JSON schema.
+
+    Returns (schema, fields); fields is None for a raw JSON schema, so no type coercion is applied.
+    """
+    if not path:
+        return None, None
+    spec = json.loads(Path(path).read_text())
+    if isinstance(spec, list):
+        from firecrawl_scraper.core import create_schema_from_fields
+        return create_schema_from_fields(spec), spec
+    return spec, None
+
+
+def load_urls(args):
+    from firecrawl_scraper.batch import parse_url_list, read_urls_csv
+
+    urls = list(args.url or [])
+    if args.urls == "-":
+        urls += parse_url_list(sys.stdin.read())
+    elif args.urls and args.urls.lower().endswith(".csv"):
+        urls += read_urls_csv(args.urls)
+    elif args.urls:
+        urls += parse_url_list(Path(args.urls).read_text())
+    return list(dict.fromkeys(urls))
+
+
+class JsonlSink:
+    """Write one JSON object per extracted row, flushing after every URL."""
+
+    def __init__(self, output):
+        self.stream = sys.stdout if output in (None, "-") else open(output, "w", encoding="utf-8")
+
+    def write(self, frame):
+        text = frame.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        if text and not text.endswith("\n"):
+            text += "\n"
+        self.stream.write(text)
+        self.stream.flush()
+
+    def close(self):
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class ParquetSink:
+    """Collect each URL's rows as an Arrow table and write them to one Parquet file on close.
+
+    Column types aren't known up front (a field can be all null for one page and
+    text for the next), so the file schema is the union of every table's: null
+    columns take the type other pages gave them, numeric types widen, and columns
+    whose types still conflict are written as text.
+    """
+
+    def __init__(self, output):
+        if output in (None, "-"):
+            raise SystemExit("--output is required for parquet format")
+        self.output = output
+        self.tables = []
+
+    def write(self, frame):
+        import pyarrow as pa
+
+        if not frame.empty:
+            self.tables.append(pa.Table.from_pandas(frame, preserve_index=False))
+
+    def close(self):
+        import pyarrow.parquet as pq
+
+        if not self.tables:
+            return
+        schema = unified_schema(self.tables)
+        with pq.ParquetWriter(self.output, schema) as writer:
+            for table in self.tables:
+                writer.write_table(conform(table, schema))
+
+
+def unified_schema(tables):
+    """One schema covering the columns of every table, in order of first appearance."""
+    import pyarrow as pa
+
+    types = {}
+    for table in tables:
+        for field in table.schema:
+            types.setdefault(field.name, []).append(field.type)
+    fields = []
+    for name, column_types in types.items():
+        try:
+            unified = pa.unify_schemas([pa.schema([(name, t)]) for t in column_types], promote_options="permissive")
+            fields.append(unified.field(name))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            logger.warning("Column %s has conflicting types %s; writing it as text", name,
+                           sorted({str(t) for t in column_types}))
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def conform(table, schema):
+    """Cast table to schema, adding missing columns as nulls and rendering conflicting ones as text."""
+    import pyarrow as pa
+
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        try:
+            columns.append(column.cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            values = column.to_pylist()
+            columns.append(pa.array([v if v is None or isinstance(v, str) else json.dumps(v, default=str)
+                                     for v in values], field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def run_extract(args):
+    import pandas as pd
+
+    from firecrawl_scraper.batch import run_batch
+    from firecrawl_scraper.cache import ExtractionCache
+    from firecrawl_scraper.core import format_extraction_result
+    from firecrawl_scraper.pages import PageCache
+    from firecrawl_scraper.transport import PooledFirecrawlApp
+
+    urls = load_urls(args)
+    if not urls:
+        raise SystemExit("No http(s) URLs given; use --urls FILE or --url URL")
+
+    api_key = args.api_key or os.getenv("FIRECRAWL_API_KEY")
+    app = PooledFirecrawlApp(api_key=api_key, api_url=args.api_url)
+    extract_params = {"prompt": args.prompt}
+    schema, fields = load_schema(args.schema)
+    if schema:
+        extract_params["schema"] = schema
+
+    pages = None if args.no_cache else PageCache(args.page_cache_path)
+    sink = JsonlSink(args.output) if args.format == "jsonl" else ParquetSink(args.output)
+    failed = empty = 0
+    try:
+        if args.changes_only:
+            from firecrawl_scraper.incremental import SnapshotStore, default_keys, diff_extraction, run_incremental
+
+            results = run_incremental(app, urls, extract_params, SnapshotStore(args.snapshot_path),
+                                      max_workers=args.concurrency, timeout=args.timeout, local_first=args.local_first,
+                                      pages=pages)
+        else:
+            cache = None if args.no_cache else ExtractionCache(args.cache_path)
+            results = run_batch(app, urls, extract_params, max_workers=args.concurrency,
+                                cache=cache, timeout=args.timeout, local_first=args.local_first, pages=pages)
+        for result in results:
+            if not result.ok:
+                failed += 1
+                logger.error("%s failed after %.1fs: %s", result.url, result.elapsed, result.error)
+                continue
+            if args.changes_only:
+                formatted = diff_extraction(result.previous, result.data, fields, default_keys(fields))
+            else:
+                formatted = format_extraction_result(result.data, fields)
+            # "No data extracted" and other placeholder texts are not rows
+            if not isinstance(formatted, pd.DataFrame):
+                empty += 1
+                logger.warning("%s: no rows in %.1fs (%s)", result.url, result.elapsed, str(formatted).strip("`\n")[:200])
+                continue
+            if formatted.empty:
+                empty += 1
+            else:
+                sink.write(formatted.assign(source_url=result.url))
+            logger.info("%s: %d rows in %.1fs%s", result.url, len(formatted), result.elapsed,
+                        " (cached)" if result.cached else " (unchanged)" if result.unchanged
+                        else " (local)" if result.local else "")
+    finally:
+        sink.close()
+    if failed or empty:
+        logger.warning("%d of %d URLs failed, %d returned no rows", failed, len(urls), empty)
+    return 1 if failed else 0
+
+
+def run_worker(args):
+    """Serve the app's job queue from this process until interrupted."""
+    from firecrawl_scraper.cache import ExtractionCache
+    from firecrawl_scraper.incremental import SnapshotStore
+    from firecrawl_scraper.jobs import JobQueue, JobStore
+    from firecrawl_scraper.metrics import start_exporters
+    from firecrawl_scraper.pages import PageCache
+    from firecrawl_scraper.ratelimit import FairRateLimiter, LimitedApp, RateLimitStore
+    from firecrawl_scraper.transport import PooledFirecrawlApp
+
+    start_exporters(port=args.metrics_port, path=args.metrics_file)
+    app = PooledFirecrawlApp(api_key=args.api_key or os.getenv("FIRECRAWL_API_KEY"), api_url=args.api_url)
+    # Same store as the app, so extra workers don't multiply the API key's rate or budgets
+    limiter = FairRateLimiter(store=RateLimitStore(args.ratelimit_path))
+    queue = JobQueue(JobStore(args.jobs_path), lambda session_id: LimitedApp(app, limiter, session_id),
+                     cache=ExtractionCache(args.cache_path), snapshots=SnapshotStore(args.snapshot_path),
+                     workers=args.workers, pages=PageCache(args.page_cache_path))
+    logger.info("Worker %s serving %s with %d threads", queue.worker_id, args.jobs_path, args.workers)
+    try:
+        queue.join()
+    except KeyboardInterrupt:
+        queue.stop()
+    return 0
+
+
+def build_parser():
+    from firecrawl_scraper.batch import DEFAULT_CONCURRENCY
+    from firecrawl_scraper.cache import DEFAULT_CACHE_PATH
+    from firecrawl_scraper.incremental import DEFAULT_SNAPSHOT_PATH
+    from firecrawl_scraper.jobs import DEFAULT_JOB_WORKERS, DEFAULT_JOBS_PATH
+    from firecrawl_scraper.local import LOCAL_FIRST
+    from firecrawl_scraper.ratelimit import DEFAULT_RATELIMIT_PATH
+    from firecrawl_scraper.metrics import METRICS_FILE, METRICS_PORT
+    from firecrawl_scraper.pages import DEFAULT_PAGES_PATH
+
+    parser = argparse.ArgumentParser(prog="firecrawl_scraper", description="Turn websites into structured data with Firecrawl.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log per-URL progress to stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="extract structured data from one or more URLs")
+    extract.add_argument("--urls", help="file with URLs (one per line, or a .csv with a url column); '-' reads stdin")
+    extract.add_argument("--url", action="append", help="a single URL; may be repeated")
+    extract.add_argument("--prompt", required=True, help="what to extract")
+    extract.add_argument("--schema", help="JSON file with [{\"name\": ..., \"type\": ...}] fields or a JSON schema")
+    extract.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    extract.add_argument("-o", "--output", help="output file (default: stdout for jsonl)")
+    extract.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    extract.add_argument("--timeout", type=float, help="per-URL timeout in seconds")
+    extract.add_argument("--no-cache", action="store_true", help="always call Firecrawl (skips the page cache too)")
+    extract.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    extract.add_argument("--page-cache-path", default=DEFAULT_PAGES_PATH)
+    extract.add_argument("--changes-only", action="store_true",
+                         help="skip pages unchanged since the last run and output only added/removed/changed rows")
+    extract.add_argument("--snapshot-path", default=DEFAULT_SNAPSHOT_PATH,
+                         help="where --changes-only keeps the previous run's results")
+    extract.add_argument("--local-first", action=argparse.BooleanOptionalAction, default=LOCAL_FIRST,
+                         help="try extracting simple schemas from a markdown scrape before calling extract")
+    extract.add_argument("--api-key", help="defaults to $FIRECRAWL_API_KEY")
+    extract.add_argument("--api-url", help="defaults to $FIRECRAWL_API_URL or the Firecrawl cloud API")
+    extract.set_defaults(func=run_extract)
+
+    worker = subparsers.add_parser("worker", help="run background extraction jobs submitted from the app")
+    worker.add_argument("--workers", type=int, default=DEFAULT_JOB_WORKERS, help="jobs to run at once")
+    worker.add_argument("--jobs-path", default=DEFAULT_JOBS_PATH)
+    worker.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    worker.add_argument("--page-cache-path", default=DEFAULT_PAGES_PATH)
+    worker.add_argument("--snapshot-path", default=DEFAULT_SNAPSHOT_PATH)
+    worker.add_argument("--ratelimit-path", default=DEFAULT_RATELIMIT_PATH,
+                        help="rate-limit and credit state shared with the app and other workers")
+    worker.add_argument("--api-key", help="defaults to $FIRECRAWL_API_KEY")
+    worker.add_argument("--api-url", help="defaults to $FIRECRAWL_API_URL or the Firecrawl cloud API")
+    worker.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="serve Prometheus metrics on this port")
+    worker.add_argument("--metrics-file", default=METRICS_FILE, help="write Prometheus metrics to this file")
+    worker.set_defaults(func=run_worker)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
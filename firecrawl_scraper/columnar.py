@@ -0,0 +1,69 @@
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from firecrawl_scraper.core import schema_fields_key
+
+logger = logging.getLogger(__name__)
+
+ARROW_TYPES = {
+    "str": pa.string(),
+    "bool": pa.bool_(),
+    "int": pa.int64(),
+    "float": pa.float64()
+}
+
+# Dictionary-encode string columns whose distinct/total ratio is at or below this
+DICTIONARY_MAX_RATIO = 0.5
+DICTIONARY_MIN_ROWS = 16
+
+
+def _column_to_arrow(series, arrow_type=None):
+    """Convert one pandas column, falling back to strings for mixed-type object columns."""
+    try:
+        return pa.array(series, type=arrow_type, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pa.array(series.astype("string"), type=pa.string(), from_pandas=True)
+
+
+def _maybe_dictionary_encode(array):
+    is_string = pa.types.is_string(array.type) or pa.types.is_large_string(array.type)
+    if not is_string or len(array) < DICTIONARY_MIN_ROWS:
+        return array
+    distinct = pc.count_distinct(array).as_py()
+    if distinct / len(array) <= DICTIONARY_MAX_RATIO:
+        return pc.dictionary_encode(array)
+    return array
+
+
+def to_arrow_table(df, fields=None):
+    """Convert an extraction DataFrame to the canonical Arrow table stored in chat history.
+
+    Declared schema fields get their Arrow type from the schema builder; other columns
+    are inferred. Low-cardinality string columns are dictionary-encoded.
+    """
+    declared = dict(schema_fields_key(fields or []))
+    arrays = []
+    for name in df.columns:
+        arrow_type = ARROW_TYPES.get(declared.get(name))
+        arrays.append(_maybe_dictionary_encode(_column_to_arrow(df[name], arrow_type)))
+    return pa.Table.from_arrays(arrays, names=[str(name) for name in df.columns])
+
+
+def is_table(value):
+    return isinstance(value, (pa.Table, pd.DataFrame))
+
+
+def table_num_rows(value):
+    return value.num_rows if isinstance(value, pa.Table) else len(value)
+
+
+def table_nbytes(value):
+    """Approximate in-memory size of a stored result."""
+    if isinstance(value, pa.Table):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return len(str(value))
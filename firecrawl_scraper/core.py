@@ -0,0 +1,211 @@
+import copy
+import logging
+from functools import lru_cache
+from typing import Dict, Any, List, Union
+
+import pandas as pd
+from pydantic import BaseModel
+
+from firecrawl_scraper.flatten import flatten_result, preview, primary_table
+
+logger = logging.getLogger(__name__)
+
+
+TYPE_MAPPING = {
+    "str": str,
+    "bool": bool,
+    "int": int,
+    "float": float
+}
+
+# Nullable pandas dtypes used when coercing extracted columns to their declared types
+PANDAS_DTYPES = {
+    "str": "string",
+    "bool": "boolean",
+    "int": "Int64",
+    "float": "Float64"
+}
+
+BOOL_STRINGS = {
+    "true": True, "yes": True, "y": True, "1": True,
+    "false": False, "no": False, "n": False, "0": False
+}
+
+
+def schema_fields_key(fields):
+    """Canonical, hashable form of the schema builder fields (unnamed fields dropped)."""
+    return tuple((field["name"], field["type"]) for field in fields if field["name"])
+
+
+@lru_cache(maxsize=128)
+def _compile_model(fields_key):
+    # Dynamically create the model class
+    return type(
+        "ExtractSchema",
+        (BaseModel,),
+        {
+            "__annotations__": {name: TYPE_MAPPING[type_name] for name, type_name in fields_key}
+        }
+    )
+
+
+@lru_cache(maxsize=128)
+def _compile_schema(fields_key):
+    return _compile_model(fields_key).model_json_schema()
+
+
+def create_dynamic_model(fields):
+    """Create a dynamic Pydantic model from schema fields (memoized per field set)."""
+    return _compile_model(schema_fields_key(fields))
+
+
+def create_schema_from_fields(fields):
+    """Create schema using Pydantic model (memoized per field set)."""
+    fields_key = schema_fields_key(fields)
+    if not fields_key:
+        return None
+    
+    # Hand out a copy so callers can't mutate the memoized schema
+    return copy.deepcopy(_compile_schema(fields_key))
+
+
+def coerce_columns(df, fields):
+    """Validate and coerce DataFrame columns to the types declared in the schema fields.
+
+    Works column by column with vectorized pandas conversions. Values that can't be
+    converted become <NA> and are counted in a warning rather than failing the result.
+    """
+    for name, type_name in schema_fields_key(fields):
+        if name not in df.columns:
+            continue
+        column = df[name]
+        if type_name in ("int", "float"):
+            if not pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+                # Tolerate thousands separators and stray whitespace in scraped numbers
+                column = column.astype("string").str.replace(r"[,\s]", "", regex=True)
+            coerced = pd.to_numeric(column, errors="coerce")
+            if type_name == "int":
+                coerced = coerced.where(coerced % 1 == 0)
+        elif type_name == "bool":
+            if pd.api.types.is_bool_dtype(column):
+                coerced = column
+            else:
+                coerced = column.astype("string").str.strip().str.lower().map(BOOL_STRINGS)
+        else:
+            coerced = column
+        coerced = coerced.astype(PANDAS_DTYPES[type_name])
+
+        invalid = int((coerced.isna() & df[name].notna()).sum())
+        if invalid:
+            logger.warning(f"{invalid} value(s) in column '{name}' could not be converted to {type_name}")
+        df[name] = coerced
+    return df
+
+
+def convert_to_table(data: Union[List[Dict], Dict]) -> str:
+    """Convert data to a markdown table.
+    
+    Args:
+        data: Either a list of dictionaries or a dictionary
+        
+    Returns:
+        A markdown table representation of the data
+    """
+    if not data:
+        return "No data extracted"
+    
+    try:
+        # Handle different data structures
+        if isinstance(data, dict):
+            # If it's a dictionary, convert to a dataframe with one row
+            df = pd.DataFrame([data])
+        elif isinstance(data, list):
+            if all(isinstance(item, dict) for item in data):
+                # If it's a list of dictionaries, convert to dataframe
+                df = pd.DataFrame(data)
+            else:
+                # If it's a list of non-dictionaries, create a simple dataframe
+                df = pd.DataFrame({"Value": data})
+        else:
+            # For other types, create a simple one-cell dataframe
+            df = pd.DataFrame({"Value": [str(data)]})
+        
+        # Handle empty dataframe
+        if df.empty:
+            return "No data extracted"
+            
+        # Return as markdown table
+        return df.to_markdown(index=False)
+    
+    except Exception as e:
+        logger.error(f"Error converting data to table: {str(e)}")
+        return f"```\n{str(data)}\n```"
+
+
+def format_extraction_result(data, fields=None):
+    """Format the extraction result for display, coercing columns to the schema field types if given."""
+    result = _frame_from_result(data)
+    if fields and isinstance(result, pd.DataFrame):
+        try:
+            result = coerce_columns(result, fields)
+        except Exception as e:
+            logger.error(f"Error coercing extraction result: {str(e)}")
+    return result
+
+
+def _frame_from_result(data):
+    """Build a DataFrame from the extraction result, flattening nested objects and every list."""
+    if not data:
+        return "No data extracted"
+    
+    try:
+        tables = flatten_result(data)
+        if tables:
+            return primary_table(tables)
+        
+        result_data = data.get('data', data) if isinstance(data, dict) else data
+        # Objects and lists flatten to at least one table whenever they hold a value
+        if not result_data or isinstance(result_data, (dict, list)):
+            return "No data extracted"
+        return f"```\n{preview(result_data)}\n```"
+            
+    except Exception as e:
+        logger.error(f"Error formatting extraction result: {str(e)}")
+        return f"```\n{preview(data)}\n```"
+
+
+# Improve the extraction call with more specific parameters
+def extract_projects(app, website_url, prompt):
+    """Enhanced extraction function specifically for projects."""
+    
+    # Create a more specific schema for projects
+    projects_schema = {
+        "type": "object",
+        "properties": {
+            "projects": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "description": {"type": "string"},
+                        "link": {"type": "string"}
+                    },
+                    "required": ["title"]
+                }
+            }
+        }
+    }
+    
+    # More specific extraction parameters
+    extract_params = {
+        'prompt': prompt,
+        'schema': projects_schema,
+        'include_html': True,  # Sometimes helps with extraction
+        'max_results': 20  # Ensure we get multiple results
+    }
+    
+    return app.extract(
+        [website_url],
+        extract_params
+    )
@@ -0,0 +1,154 @@
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from firecrawl_scraper.cache import normalize_url
+from firecrawl_scraper.pages import PageCache, scrape_page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_DEPTH = 2
+DEFAULT_MAX_PAGES = 50
+# Upper bound on links requested from the map endpoint in one call
+MAP_LIMIT = 5000
+
+
+def parse_patterns(text: str) -> List[str]:
+    """Split comma or newline separated path patterns, e.g. "/blog/*, /docs/*"."""
+    return [p.strip() for p in re.split(r"[\n,]+", text or "") if p.strip()]
+
+
+def split_wildcard(url: str) -> Tuple[str, List[str]]:
+    """Turn a wildcard URL like https://site.com/blog/* into a crawl root and include pattern."""
+    if "*" not in url:
+        return url, []
+    parts = urlsplit(url)
+    root_path = parts.path[:parts.path.index("*")] if "*" in parts.path else parts.path
+    root_path = root_path[:root_path.rfind("/") + 1] or "/"
+    return f"{parts.scheme}://{parts.netloc}{root_path}", [parts.path or "/*"]
+
+
+@dataclass
+class CrawlScope:
+    """Which discovered URLs belong to a crawl.
+
+    A URL is in scope when it is on the root's host, under the root's path, at most
+    max_depth path segments below it, matches one of the include patterns (if any)
+    and none of the exclude patterns. Patterns are shell-style globs matched against
+    the URL path ("/blog/*").
+    """
+    root_url: str
+    include: Sequence[str] = ()
+    exclude: Sequence[str] = ()
+    max_depth: int = DEFAULT_MAX_DEPTH
+
+    def __post_init__(self):
+        parts = urlsplit(normalize_url(self.root_url))
+        self._host = parts.netloc
+        self._root_segments = [s for s in parts.path.split("/") if s]
+
+    def depth(self, url: str) -> Optional[int]:
+        """Path segments between the root and url, or None if url is outside the root."""
+        parts = urlsplit(normalize_url(url))
+        if parts.netloc != self._host:
+            return None
+        segments = [s for s in parts.path.split("/") if s]
+        if segments[:len(self._root_segments)] != self._root_segments:
+            return None
+        return len(segments) - len(self._root_segments)
+
+    def allows(self, url: str) -> bool:
+        if not url.startswith(("http://", "https://")):
+            return False
+        depth = self.depth(url)
+        if depth is None or depth > self.max_depth:
+            return False
+        path = urlsplit(url).path or "/"
+        if self.include and not any(fnmatch(path, pattern) for pattern in self.include):
+            return False
+        return not any(fnmatch(path, pattern) for pattern in self.exclude)
+
+
+class CrawlFrontier:
+    """FIFO of in-scope URLs to visit, de-duplicated on the normalized URL."""
+
+    def __init__(self, scope: CrawlScope, max_pages: int = DEFAULT_MAX_PAGES):
+        self.scope = scope
+        self.max_pages = max_pages
+        self.urls: List[str] = []
+        self._seen = set()
+        self._pending = deque()
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def full(self) -> bool:
+        return len(self.urls) >= self.max_pages
+
+    def add(self, url: str) -> bool:
+        """Queue url if it is new, in scope and the page budget allows. Returns whether it was added."""
+        url = url.split("#", 1)[0]
+        key = normalize_url(url)
+        if self.full or key in self._seen or not self.scope.allows(url):
+            return False
+        self._seen.add(key)
+        self.urls.append(url)
+        self._pending.append(url)
+        return True
+
+    def seed(self, url: str) -> None:
+        """Queue url for link discovery without counting it as a page to extract."""
+        self._seen.add(normalize_url(url))
+        self._pending.append(url)
+
+    def pop(self) -> Optional[str]:
+        return self._pending.popleft() if self._pending else None
+
+
+def discover_urls(app, scope: CrawlScope, max_pages: int = DEFAULT_MAX_PAGES,
+                  follow_links: bool = True, pages: Optional[PageCache] = None) -> List[str]:
+    """Find up to max_pages in-scope URLs below scope.root_url.
+
+    One map call lists the site's known URLs. If that turns up nothing beyond the
+    root (no sitemap, or map failed) and follow_links is set, pages are scraped for
+    links breadth-first instead, until the frontier is full or runs dry. Those
+    scrapes go through the PageCache pages if given, so extracting the discovered
+    pages locally afterwards doesn't fetch them again.
+    """
+    frontier = CrawlFrontier(scope, max_pages)
+    if not frontier.add(scope.root_url):
+        # The root itself may be filtered out by include patterns; it still seeds discovery
+        frontier.seed(scope.root_url)
+
+    try:
+        links = app.map_url(scope.root_url, params={"limit": MAP_LIMIT}).get("links", [])
+    except Exception as e:
+        logger.warning(f"Map failed for {scope.root_url}, falling back to link discovery: {e}")
+        links = []
+    for link in links:
+        frontier.add(link)
+        if frontier.full:
+            break
+
+    if follow_links and len(frontier) <= 1:
+        scraped = 0
+        while not frontier.full and scraped < max_pages:
+            url = frontier.pop()
+            if url is None:
+                break
+            scraped += 1
+            try:
+                page = scrape_page(app, url, pages, formats=["links"])
+            except Exception as e:
+                logger.warning(f"Could not scrape {url} for links: {e}")
+                continue
+            for link in (page or {}).get("links", []):
+                frontier.add(urljoin(url, link))
+
+    logger.info(f"Discovered {len(frontier)} pages under {scope.root_url}")
+    return frontier.urls
@@ -0,0 +1,139 @@
+import io
+import logging
+import os
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from firecrawl_scraper.columnar import to_arrow_table
+from firecrawl_scraper.history import SpilledResult
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "jsonl": "application/x-ndjson",
+}
+DEFAULT_CHUNK_ROWS = 10_000
+# Integer and boolean columns with nulls keep their type in pandas instead of becoming float / object
+NULLABLE_DTYPES = {
+    pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype(),
+    pa.uint8(): pd.UInt8Dtype(), pa.uint16(): pd.UInt16Dtype(), pa.uint32(): pd.UInt32Dtype(), pa.uint64(): pd.UInt64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands out whatever was written since the last drain.
+
+    Lets Arrow's writers stream into a generator instead of a growing in-memory buffer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_record_batches(content: Any, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pa.RecordBatch]:
+    """Yield a stored result as record batches of at most chunk_rows rows.
+
+    Spilled results are read batch by batch from their memory-mapped Arrow file, so
+    they are never loaded whole. DataFrames are converted to Arrow once, zero-copy
+    where pandas allows.
+    """
+    if isinstance(content, SpilledResult):
+        with pa.memory_map(content.path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for offset in range(0, batch.num_rows, chunk_rows):
+                    yield batch.slice(offset, chunk_rows)
+        return
+    table = content if isinstance(content, pa.Table) else to_arrow_table(content)
+    yield from table.to_batches(max_chunksize=chunk_rows)
+
+
+def _decoded(batch: pa.RecordBatch):
+    """Pandas view of a batch with dictionary columns turned back into plain values and nullable ints kept whole."""
+    return batch.to_pandas(strings_to_categorical=False, types_mapper=NULLABLE_DTYPES.get).astype(
+        {name: object for name, field in zip(batch.schema.names, batch.schema) if pa.types.is_dictionary(field.type)}
+    )
+
+
+def iter_export(content: Any, fmt: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode a stored result as CSV, Parquet or JSONL, yielding bytes one chunk at a time.
+
+    Only one chunk of rows is ever converted at once: CSV and JSONL are rendered per
+    batch, Parquet is written one row group per batch.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+
+    batches = iter_record_batches(content, chunk_rows)
+    if fmt == "parquet":
+        sink = _ChunkSink()
+        writer = None
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(sink, batch.schema, compression="zstd")
+            writer.write_batch(batch)
+            yield sink.drain()
+        if writer is not None:
+            writer.close()
+            yield sink.drain()
+        return
+
+    header = True
+    for batch in batches:
+        frame = _decoded(batch)
+        if fmt == "csv":
+            yield frame.to_csv(index=False, header=header).encode("utf-8")
+            header = False
+        elif len(frame):
+            text = frame.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+            yield (text if text.endswith("\n") else text + "\n").encode("utf-8")
+
+
+def export_result(content: Any, fmt: str, destination: Union[str, os.PathLike, BinaryIO],
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                  progress: Optional[Callable[[int], None]] = None) -> int:
+    """Stream a stored result to a path or binary file object. Returns the bytes written.
+
+    content may be a DataFrame, an Arrow table or a SpilledResult, i.e. anything that
+    format_extraction_result produced and ChatHistory holds. progress, if given, is
+    called with the running byte count after every chunk.
+    """
+    written = 0
+    handle = open(destination, "wb") if isinstance(destination, (str, os.PathLike)) else destination
+    try:
+        for chunk in iter_export(content, fmt, chunk_rows):
+            handle.write(chunk)
+            written += len(chunk)
+            if progress is not None:
+                progress(written)
+    finally:
+        if handle is not destination:
+            handle.close()
+    logger.info(f"Exported {written} bytes as {fmt}")
+    return written
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List
+
+from firecrawl_scraper.cache import normalize_url
+from firecrawl_scraper.metrics import METRICS, STAGE_SECONDS
+
+EXTRACT_POLL_INTERVAL = float(os.getenv("FIRECRAWL_POLL_INTERVAL", 1.0))
+EXTRACT_JOB_PARAMS = ("prompt", "schema", "systemPrompt", "enableWebSearch", "showSources")
+
+
+def estimate_progress(elapsed):
+    """Progress (10-95) for a running extract job, which reports no percentage of its own.
+
+    Approaches 95% asymptotically with elapsed time.
+    """
+    return int(10 + 85 * (1 - math.exp(-elapsed / 20)))
+
+
+class ExtractionJob:
+    """Run a Firecrawl async extract job on a background thread and expose its live state."""
+
+    def __init__(self, app, urls, extract_params, poll_interval=EXTRACT_POLL_INTERVAL):
+        self.app = app
+        self.urls = urls
+        # async_extract forwards params verbatim to the API, so only send the keys it understands
+        self.params = {k: v for k, v in extract_params.items() if k in EXTRACT_JOB_PARAMS}
+        self.poll_interval = poll_interval
+        self.job_id = None
+        self.status = "submitting"
+        self.started_at = time.monotonic()
+        self._result = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            response = self.app.async_extract(self.urls, self.params)
+            if not response or not response.get("success") or not response.get("id"):
+                raise RuntimeError(f"Failed to start extract job: {(response or {}).get('error', response)}")
+            self.job_id = response["id"]
+            self.status = "processing"
+
+            while True:
+                status_data = self.app.get_extract_status(self.job_id)
+                self.status = status_data.get("status", self.status)
+                if self.status == "completed":
+                    if not status_data.get("success", True):
+                        raise RuntimeError(f"Failed to extract. Error: {status_data.get('error')}")
+                    self._result = status_data
+                    return
+                if self.status in ("failed", "cancelled"):
+                    raise RuntimeError(f"Extract job {self.status}. Error: {status_data.get('error')}")
+                time.sleep(self.poll_interval)
+        except Exception as e:
+            self._error = e
+        finally:
+            METRICS.observe(STAGE_SECONDS, self.elapsed, stage="extract")
+            self._done.set()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or the timeout expires. Returns True when finished."""
+        return self._done.wait(timeout)
+
+    def status_message(self):
+        if self.job_id is None:
+            # Rate-limited clients (ratelimit.LimitedApp) report where the submission is queued
+            position = self.app.queue_position() if hasattr(self.app, "queue_position") else None
+            if position:
+                return f"Waiting for a rate-limit slot (position {position} in queue)..."
+            return "Submitting extraction job..."
+        return f"Extraction job {self.job_id[:8]} is {self.status} ({self.elapsed:.0f}s elapsed)..."
+
+    def result(self, timeout=None):
+        """Return the completed job payload, re-raising any error from the worker thread."""
+        if not self.wait(timeout):
+            raise TimeoutError(f"Extraction job {self.job_id or ''} did not finish within {timeout}s")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """Process-wide registry of in-flight extraction jobs.
+
+    Streamlit sessions share one FirecrawlApp; start() hands a caller the running
+    job for an identical request (same API endpoint and key, URLs and extract params) instead of
+    submitting another one, so concurrent duplicates cost a single extract call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ExtractionJob] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(app, urls, extract_params) -> str:
+        # Keyed on the API endpoint and key rather than the client object, so per-session
+        # wrappers around the shared client still coalesce
+        account = hashlib.sha256(str(getattr(app, "api_key", id(app))).encode()).hexdigest()
+        params = {k: v for k, v in extract_params.items() if k in EXTRACT_JOB_PARAMS}
+        return json.dumps([getattr(app, "api_url", None), account, sorted(normalize_url(u) for u in urls), params],
+                          sort_keys=True, default=str)
+
+    def start(self, app, urls, extract_params, poll_interval=EXTRACT_POLL_INTERVAL) -> ExtractionJob:
+        """Join the identical job in flight, or start a new one."""
+        key = self.key(app, urls, extract_params)
+        with self._lock:
+            # Finished jobs are dropped lazily, so the registry only ever holds running ones
+            self._jobs = {k: job for k, job in self._jobs.items() if not job.wait(0)}
+            job = self._jobs.get(key)
+            if job is not None:
+                self.coalesced += 1
+                return job
+            job = ExtractionJob(app, urls, extract_params, poll_interval)
+            self._jobs[key] = job
+            self.started += 1
+            return job
+
+    def running(self, app) -> List[ExtractionJob]:
+        """Unfinished jobs started through app (e.g. one background job's LimitedApp)."""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.app is app and not job.wait(0)]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            in_flight = sum(1 for job in self._jobs.values() if not job.wait(0))
+            requests = self.started + self.coalesced
+            return {
+                "started": self.started,
+                "coalesced": self.coalesced,
+                "in_flight": in_flight,
+                "coalesce_rate": self.coalesced / requests if requests else 0.0,
+            }
+
+
+SINGLE_FLIGHT = SingleFlight()
+
+
+def start_extraction(app, urls, extract_params, poll_interval=EXTRACT_POLL_INTERVAL) -> ExtractionJob:
+    """Start an extraction job, sharing it with any identical request already in flight in this process."""
+    return SINGLE_FLIGHT.start(app, urls, extract_params, poll_interval)
@@ -0,0 +1,144 @@
+import logging
+import reprlib
+from typing import Any, Dict, List
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ROOT_TABLE = "root"
+PARENT_COLUMN = "_parent_row"
+DEFAULT_MAX_DEPTH = 3
+
+# Bounded repr for payloads that can't be tabulated, so huge results never get str()-ed whole
+_preview = reprlib.Repr()
+_preview.maxstring = 2000
+_preview.maxother = 2000
+_preview.maxlist = 50
+_preview.maxdict = 50
+_preview.maxlevel = 4
+
+
+def preview(data: Any) -> str:
+    """Size-bounded textual preview of an arbitrary payload."""
+    return _preview.repr(data)
+
+
+def _is_record_list(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(item, dict) for item in value)
+
+
+def _first_valid(column: pd.Series) -> Any:
+    index = column.first_valid_index()
+    return None if index is None else column.at[index]
+
+
+def _normalize_records(records: List[dict], sep: str, max_level: int) -> pd.DataFrame:
+    """Column-wise equivalent of pd.json_normalize.
+
+    The frame is built from the records in one pass, then each object-valued column is
+    expanded into dotted columns as a whole, level by level. This is several times
+    faster than json_normalize's per-record flattening on large payloads.
+    """
+    frame = pd.DataFrame(records)
+    for _ in range(max_level):
+        pieces = []
+        expanded = False
+        for column in frame.columns:
+            series = frame[column]
+            if series.dtype == object and isinstance(_first_valid(series), dict):
+                valid = series.dropna()
+                values = valid.tolist()
+                if all(isinstance(value, dict) for value in values):
+                    nested = pd.DataFrame(values, index=valid.index).reindex(frame.index)
+                    nested.columns = [f"{column}{sep}{key}" for key in nested.columns]
+                    pieces.append(nested)
+                    expanded = True
+                    continue
+            pieces.append(series.to_frame())
+        if not expanded:
+            break
+        frame = pd.concat(pieces, axis=1)
+    return frame
+
+
+def _records_to_tables(records: List[Any], name: str, tables: Dict[str, pd.DataFrame],
+                       depth: int, max_depth: int, sep: str) -> None:
+    """Normalize a list of records into tables[name]; arrays of objects become child tables."""
+    if not _is_record_list(records):
+        tables[name] = pd.DataFrame({"Value": records})
+        return
+
+    # Nested objects become dotted columns
+    frame = _normalize_records(records, sep, max_depth)
+    # Register the parent before its children so tables keep a parent-first order
+    tables[name] = frame
+    if depth < max_depth:
+        for column in list(frame.columns):
+            if not _is_record_list(_first_valid(frame[column])):
+                continue
+            # explode keeps the parent row index, which links child rows to their parent
+            exploded = frame[column].explode().dropna()
+            children = exploded.tolist()
+            if not all(isinstance(child, dict) for child in children):
+                continue
+            frame = frame.drop(columns=column)
+            child_name = f"{name}{sep}{column}"
+            _records_to_tables(children, child_name, tables, depth + 1, max_depth, sep)
+            tables[child_name].insert(0, PARENT_COLUMN, exploded.index.to_numpy())
+    tables[name] = frame
+
+
+def flatten_result(data: Any, max_depth: int = DEFAULT_MAX_DEPTH, sep: str = ".") -> Dict[str, pd.DataFrame]:
+    """Flatten an extract payload into related tables.
+
+    Scalars and nested objects at the top level go to the "root" table (one row).
+    Each non-empty top-level list becomes its own table named after its key, with
+    nested objects normalized into dotted columns. Arrays of objects inside rows are
+    exploded into child tables ("projects.links") whose _parent_row column points at
+    the parent table's row. Work is done a column at a time with DataFrame
+    construction and explode, never with a Python loop over rows.
+    """
+    result_data = data.get("data", data) if isinstance(data, dict) else data
+    tables: Dict[str, pd.DataFrame] = {}
+
+    if isinstance(result_data, list):
+        if result_data:
+            _records_to_tables(result_data, ROOT_TABLE, tables, 0, max_depth, sep)
+        return tables
+
+    if not isinstance(result_data, dict):
+        return tables
+
+    scalars = {key: value for key, value in result_data.items() if not isinstance(value, list)}
+    lists = {key: value for key, value in result_data.items() if isinstance(value, list) and value}
+    # An object whose only lists are empty holds no rows at all
+    if scalars:
+        _records_to_tables([scalars], ROOT_TABLE, tables, 0, max_depth, sep)
+    for key, value in lists.items():
+        _records_to_tables(value, str(key), tables, 0, max_depth, sep)
+    return tables
+
+
+def primary_table(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Combine related tables into the single table shown in the chat.
+
+    A lone table is returned as is. With a root row and one top-level list, the root
+    fields are broadcast onto the list rows. Otherwise the tables are stacked with a
+    leading "table" column naming the table each row came from.
+    """
+    if len(tables) == 1:
+        return next(iter(tables.values()))
+
+    top_level = [name for name in tables if name != ROOT_TABLE and "." not in name]
+    if ROOT_TABLE in tables and len(tables) == 2 and len(top_level) == 1:
+        root = tables[ROOT_TABLE]
+        rows = tables[top_level[0]]
+        extra = [column for column in root.columns if column not in rows.columns]
+        return rows.assign(**{column: root.at[0, column] for column in extra})
+
+    combined = pd.concat(tables, names=["table", None]).reset_index(level=0)
+    if PARENT_COLUMN in combined:
+        # Rows of tables without a parent are NaN here, which would turn the row numbers into floats
+        combined[PARENT_COLUMN] = combined[PARENT_COLUMN].astype("Int64")
+    return combined.reset_index(drop=True)
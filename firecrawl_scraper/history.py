@@ -0,0 +1,209 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_HISTORY_DIR = os.getenv("FIRECRAWL_HISTORY_DIR", ".cache/history")
+DEFAULT_MAX_IN_MEMORY = int(os.getenv("FIRECRAWL_HISTORY_IN_MEMORY", 3))
+DEFAULT_MAX_BYTES = int(os.getenv("FIRECRAWL_HISTORY_MAX_BYTES", 64 * 1024 * 1024))
+SPILL_COMPRESSION = "zstd"
+# Spilled tables are written in batches so exports can stream them back a batch at a time
+SPILL_BATCH_ROWS = 10_000
+
+# pyarrow and the columnar helpers are imported inside the methods that need them,
+# so creating an empty history at session start stays cheap.
+
+
+@dataclass
+class SpilledResult:
+    """Placeholder for a result table that was moved out of memory to an Arrow IPC file."""
+    path: str
+    num_rows: int
+    nbytes: int
+
+    def load(self):
+        import pyarrow as pa
+
+        with pa.memory_map(self.path) as source:
+            return pa.ipc.open_file(source).read_all()
+
+
+@dataclass
+class ExpiredResult:
+    """Placeholder for a result dropped from an idle session to keep the server under its memory budget."""
+    num_rows: int
+    expired_at: float
+
+
+class ChatHistory:
+    """Per-session chat history that keeps only the newest results in memory.
+
+    Messages are plain {"role", "content"} dicts. Whenever more than max_in_memory
+    result tables are held, or their total size exceeds max_bytes, the oldest are
+    written to compressed Arrow files under the session's spill directory and
+    replaced by a SpilledResult. The newest result stays in memory unless the
+    server-wide SessionRegistry compacts or expires the session while it is idle.
+    """
+
+    def __init__(self, session_id: Optional[str] = None, spill_dir: str = DEFAULT_HISTORY_DIR,
+                 max_in_memory: int = DEFAULT_MAX_IN_MEMORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.spill_dir = Path(spill_dir) / self.session_id
+        self.max_in_memory = max_in_memory
+        self.max_bytes = max_bytes
+        self.messages: List[Dict[str, Any]] = []
+        # Bytes of other per-session state (profiles, a running job's live table), as reported by the app
+        self.other_bytes: Dict[str, int] = {}
+        self.last_active = time.time()
+        # The SessionRegistry compacts and expires histories from other sessions' threads
+        self._lock = threading.RLock()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def append(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            self.messages.append(message)
+            self.touch()
+            self._enforce_limits()
+
+    def touch(self) -> None:
+        """Mark the session as in use, so the SessionRegistry reclaims other sessions' results first."""
+        self.last_active = time.time()
+
+    def load(self, index: int) -> Any:
+        """Return the content of a message, rehydrating it from disk if it was spilled."""
+        self.touch()
+        content = self.messages[index]["content"]
+        return content.load() if isinstance(content, SpilledResult) else content
+
+    def result_indices(self) -> List[int]:
+        """Indices of messages holding a result table, in memory or spilled."""
+        from firecrawl_scraper.columnar import is_table
+
+        return [i for i, m in enumerate(self.messages)
+                if isinstance(m["content"], SpilledResult) or is_table(m["content"])]
+
+    def report(self, name: str, nbytes: int) -> None:
+        """Record the size of other per-session state, so the SessionRegistry counts it against the budget."""
+        with self._lock:
+            if nbytes:
+                self.other_bytes[name] = nbytes
+            else:
+                self.other_bytes.pop(name, None)
+
+    def text_bytes(self) -> int:
+        return sum(len(m["content"].encode()) for m in self.messages if isinstance(m["content"], str))
+
+    def memory_bytes(self) -> int:
+        """Everything the session holds in memory: result tables, chat text and reported other state."""
+        from firecrawl_scraper.columnar import is_table, table_nbytes
+
+        with self._lock:
+            tables = sum(table_nbytes(m["content"]) for m in self.messages if is_table(m["content"]))
+            return tables + self.text_bytes() + sum(self.other_bytes.values())
+
+    def stats(self) -> Dict[str, int]:
+        from firecrawl_scraper.columnar import is_table, table_nbytes, table_num_rows
+
+        in_memory = [m["content"] for m in self.messages if is_table(m["content"])]
+        spilled = [m["content"] for m in self.messages if isinstance(m["content"], SpilledResult)]
+        expired = [m["content"] for m in self.messages if isinstance(m["content"], ExpiredResult)]
+        return {
+            "in_memory": len(in_memory),
+            "in_memory_bytes": sum(table_nbytes(t) for t in in_memory),
+            "text_bytes": self.text_bytes(),
+            "other_bytes": sum(self.other_bytes.values()),
+            "spilled": len(spilled),
+            "spilled_bytes": sum(s.nbytes for s in spilled),
+            "rows": sum(table_num_rows(t) for t in in_memory) + sum(s.num_rows for s in spilled),
+            "expired": len(expired),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.messages = []
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def compact(self, keep_newest: bool = True) -> int:
+        """Spill in-memory result tables to disk, all of them or all but the newest. Returns the bytes freed."""
+        from firecrawl_scraper.columnar import is_table, table_nbytes
+
+        freed = 0
+        with self._lock:
+            resident = [i for i, m in enumerate(self.messages) if is_table(m["content"])]
+            for index in resident[:-1] if keep_newest else resident:
+                freed += table_nbytes(self.messages[index]["content"])
+                self.messages[index] = {**self.messages[index], "content": self._spill(index)}
+        return freed
+
+    def expire(self) -> int:
+        """Replace every result, in memory or spilled, by an ExpiredResult. Returns the in-memory bytes freed."""
+        from firecrawl_scraper.columnar import is_table, table_nbytes, table_num_rows
+
+        freed = 0
+        now = time.time()
+        with self._lock:
+            for index, message in enumerate(self.messages):
+                content = message["content"]
+                if isinstance(content, SpilledResult):
+                    num_rows = content.num_rows
+                elif is_table(content):
+                    num_rows = table_num_rows(content)
+                    freed += table_nbytes(content)
+                else:
+                    continue
+                self.messages[index] = {**message, "content": ExpiredResult(num_rows, now)}
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+        return freed
+
+    def _enforce_limits(self) -> None:
+        from firecrawl_scraper.columnar import is_table, table_nbytes
+
+        with self._lock:
+            resident = [i for i, m in enumerate(self.messages) if is_table(m["content"])]
+            total = sum(table_nbytes(self.messages[i]["content"]) for i in resident)
+            # Oldest first, never the newest result
+            for index in resident[:-1]:
+                if len(resident) <= self.max_in_memory and total <= self.max_bytes:
+                    break
+                nbytes = table_nbytes(self.messages[index]["content"])
+                self.messages[index] = {**self.messages[index], "content": self._spill(index)}
+                resident.remove(index)
+                total -= nbytes
+
+    def _spill(self, index: int) -> SpilledResult:
+        import pyarrow as pa
+
+        content = self.messages[index]["content"]
+        table = content if isinstance(content, pa.Table) else pa.Table.from_pandas(content, preserve_index=False)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"{index:06d}-{uuid.uuid4().hex[:8]}.arrow"
+        options = pa.ipc.IpcWriteOptions(compression=SPILL_COMPRESSION)
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table, max_chunksize=SPILL_BATCH_ROWS)
+        return SpilledResult(str(path), table.num_rows, table.nbytes)
+
+
+def cleanup_stale_sessions(spill_dir: str = DEFAULT_HISTORY_DIR, max_age: float = 24 * 60 * 60) -> int:
+    """Remove spill directories of sessions untouched for max_age seconds. Returns how many were removed."""
+    root = Path(spill_dir)
+    if not root.exists():
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for session_dir in root.iterdir():
+        if session_dir.is_dir() and session_dir.stat().st_mtime < cutoff:
+            shutil.rmtree(session_dir, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from firecrawl_scraper.batch import DEFAULT_CONCURRENCY, BatchResult
+from firecrawl_scraper.cache import make_cache_key, normalize_url
+from firecrawl_scraper.extraction import start_extraction
+from firecrawl_scraper.local import extract_page
+from firecrawl_scraper.pages import PageCache, page_validators, scrape_page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.getenv("FIRECRAWL_SNAPSHOT_PATH", ".cache/snapshots.sqlite3")
+CHANGE_COLUMN = "change"
+
+
+def _validator_fingerprint(url: str) -> Optional[str]:
+    """ETag / Last-Modified from a HEAD request, or None if the server sends neither."""
+    validators = page_validators(url)
+    if validators is None or validators["status"] >= 400:
+        return None
+    # Weak and strong ETags both change when the content does; W/ only affects byte-equality
+    if validators["etag"]:
+        return f"etag:{validators['etag'].removeprefix('W/')}"
+    return f"modified:{validators['last_modified']}" if validators["last_modified"] else None
+
+
+def _markdown_fingerprint(app, url: str, pages: Optional[PageCache] = None) -> Optional[str]:
+    """SHA-256 of the page's markdown, whitespace-normalized, from a fresh scrape."""
+    try:
+        # A cached copy would report a page as unchanged for up to the cache TTL after it changed
+        page = scrape_page(app, url, pages, formats=["markdown"], fresh=True)
+    except Exception as e:
+        logger.warning(f"Could not scrape {url} for a fingerprint: {e}")
+        return None
+    markdown = re.sub(r"\s+", " ", (page or {}).get("markdown") or "").strip()
+    if not markdown:
+        return None
+    return "sha256:" + hashlib.sha256(markdown.encode()).hexdigest()
+
+
+def fingerprint_page(app, url: str, use_validators: bool = True, pages: Optional[PageCache] = None) -> Optional[str]:
+    """Cheap content fingerprint for a page, or None if none could be taken.
+
+    HTTP validators are tried first since they cost nothing; pages without them are
+    scraped to markdown, which is far cheaper than an extract call. That scrape
+    never comes from the page cache, but it refreshes it, so local extraction of
+    the same page reuses it.
+    """
+    fingerprint = _validator_fingerprint(url) if use_validators else None
+    return fingerprint or _markdown_fingerprint(app, url, pages)
+
+
+class SnapshotStore:
+    """SQLite store of the last extract payload and content fingerprint per URL, prompt and schema.
+
+    Unlike ExtractionCache, snapshots never expire: they are what the next run
+    compares against, however long ago the previous run was.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                fingerprint TEXT,
+                payload BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, key: str) -> Tuple[Optional[str], Any]:
+        """Return (fingerprint, payload) of the last run, or (None, None) if there was none."""
+        with self._lock:
+            row = self._conn.execute("SELECT fingerprint, payload FROM snapshots WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, None
+        return row[0], json.loads(zlib.decompress(row[1]))
+
+    def set(self, key: str, url: str, fingerprint: Optional[str], payload: Any) -> None:
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                (key, normalize_url(url), fingerprint, blob, time.time()),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM snapshots")
+
+
+def run_incremental(app, urls: Iterable[str], extract_params: dict, store: SnapshotStore,
+                    max_workers: int = DEFAULT_CONCURRENCY, timeout: Optional[float] = None,
+                    use_validators: bool = True, local_first: bool = False,
+                    pages: Optional[PageCache] = None) -> Iterator[BatchResult]:
+    """Like run_batch, but only re-extract pages whose fingerprint changed since the last run.
+
+    Each result carries the previous payload in .previous. Unchanged pages come
+    back with unchanged=True and the stored payload as .data, without an extract call.
+    """
+    def refresh_one(url):
+        started = time.monotonic()
+        key = make_cache_key(url, extract_params.get("prompt"), extract_params.get("schema"))
+        previous_fingerprint, previous = store.get(key)
+        fingerprint = fingerprint_page(app, url, use_validators, pages)
+        if fingerprint is not None and fingerprint == previous_fingerprint:
+            return BatchResult(url, previous, elapsed=time.monotonic() - started, previous=previous, unchanged=True)
+        try:
+            if local_first:
+                data, local = extract_page(app, url, extract_params, timeout, pages=pages)
+            else:
+                data, local = start_extraction(app, [url], extract_params).result(timeout), False
+        except Exception as e:
+            return BatchResult(url, error=str(e), elapsed=time.monotonic() - started, previous=previous)
+        store.set(key, url, fingerprint, data)
+        return BatchResult(url, data, elapsed=time.monotonic() - started, previous=previous, local=local)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="incremental-extract") as pool:
+        futures = [pool.submit(refresh_one, url) for url in urls]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # A consumer that stops early (e.g. a worker that lost its job) doesn't pay for the rest
+            for future in futures:
+                future.cancel()
+
+
+def diff_rows(previous, current, keys: Sequence[str] = ()):
+    """Rows added, removed or changed between two result frames, tagged in a leading "change" column.
+
+    Rows are matched on the key columns; without keys the whole row is the key, so
+    edits show up as a removed plus an added row. Comparison is done on hashed rows,
+    not row by row.
+    """
+    import pandas as pd
+
+    columns = list(dict.fromkeys([*current.columns, *previous.columns]))
+    if not columns:
+        return pd.DataFrame(columns=[CHANGE_COLUMN])
+    previous = previous.reindex(columns=columns)
+    current = current.reindex(columns=columns)
+    keys = [k for k in keys if k in columns] or columns
+
+    def hashed(frame, subset):
+        # astype(str) makes list-valued cells hashable and NA comparable
+        return pd.util.hash_pandas_object(frame[subset].astype(str), index=False)
+
+    previous_keys, current_keys = hashed(previous, keys), hashed(current, keys)
+    previous_rows, current_rows = hashed(previous, columns), hashed(current, columns)
+
+    added = current[~current_keys.isin(previous_keys)]
+    removed = previous[~previous_keys.isin(current_keys)]
+    changed = current[current_keys.isin(previous_keys) & ~current_rows.isin(previous_rows)]
+    parts = [frame.assign(**{CHANGE_COLUMN: change})
+             for frame, change in ((added, "added"), (changed, "changed"), (removed, "removed")) if len(frame)]
+    if not parts:
+        return pd.DataFrame(columns=[CHANGE_COLUMN] + columns)
+    # Empty parts are left out so they don't widen the column dtypes
+    return pd.concat(parts, ignore_index=True)[[CHANGE_COLUMN] + columns]
+
+
+def diff_extraction(previous: Any, current: Any, fields: Optional[List[dict]] = None,
+                    keys: Sequence[str] = ()):
+    """Format two extract payloads like format_extraction_result and diff their rows."""
+    import pandas as pd
+    from firecrawl_scraper.core import format_extraction_result
+
+    def frame(data):
+        formatted = format_extraction_result(data, fields) if data is not None else None
+        return formatted if isinstance(formatted, pd.DataFrame) else pd.DataFrame()
+
+    return diff_rows(frame(previous), frame(current), keys)
+
+
+def default_keys(fields: Optional[List[dict]]) -> List[str]:
+    """Row identity for diffs: the first named schema field, if any."""
+    names = [f["name"].strip() for f in fields or [] if f.get("name", "").strip()]
+    return names[:1]
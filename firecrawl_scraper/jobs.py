@@ -0,0 +1,369 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from firecrawl_scraper.batch import DEFAULT_CONCURRENCY, BatchResult, run_batch
+from firecrawl_scraper.extraction import SINGLE_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_PATH = os.getenv("FIRECRAWL_JOBS_PATH", ".cache/jobs.sqlite3")
+DEFAULT_JOB_WORKERS = int(os.getenv("FIRECRAWL_JOB_WORKERS", 2))
+HEARTBEAT_INTERVAL = 10.0
+# A running job whose worker has not checked in for this long is assumed dead and requeued
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL
+IDLE_POLL_INTERVAL = 0.5
+# How often a worker records what its running jobs are waiting on, for the UI
+DETAIL_INTERVAL = 1.0
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class JobLost(Exception):
+    """The job was requeued and claimed by another worker while this one was still running it."""
+
+
+def _pack(value: Any) -> Optional[bytes]:
+    return None if value is None else zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+
+
+def _unpack(blob: Optional[bytes]) -> Any:
+    return None if blob is None else json.loads(zlib.decompress(blob))
+
+
+class JobStore:
+    """SQLite-backed job queue: job specs, state and per-URL results.
+
+    Any number of worker threads or processes can share one store; jobs are
+    claimed atomically, and results are appended as URLs finish so a client can
+    show progress and pick the job up again after a rerun or reconnect.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOBS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                spec TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total INTEGER,
+                done INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                worker TEXT,
+                detail TEXT,
+                attempt INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                data BLOB,
+                previous BLOB,
+                error TEXT,
+                elapsed REAL NOT NULL,
+                cached INTEGER NOT NULL,
+                unchanged INTEGER NOT NULL,
+                local INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, seq)
+            );
+        """)
+        # Stores created before results recorded local extraction, or jobs their progress detail and attempt
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_results)")}
+        if "local" not in columns:
+            self._conn.execute("ALTER TABLE job_results ADD COLUMN local INTEGER NOT NULL DEFAULT 0")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "detail" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN detail TEXT")
+        if "attempt" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN attempt INTEGER NOT NULL DEFAULT 0")
+
+    def submit(self, session_id: str, spec: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        total = None if spec.get("crawl") else len(spec["urls"])
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, session_id, spec, status, total, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, session_id, json.dumps(spec), total, now, now),
+            )
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job for worker, requeueing jobs of dead workers first.
+
+        Each claim starts a new attempt with no results, so clients following the job
+        start over when its attempt number changes.
+        """
+        now = time.time()
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND updated_at < ?", (now - STALE_AFTER,)
+            )]
+            for job_id in stale:
+                logger.warning(f"Requeueing job {job_id[:8]}, its worker stopped responding")
+                self._conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                self._conn.execute("UPDATE jobs SET status = 'queued', worker = NULL, done = 0 WHERE id = ?", (job_id,))
+            row = self._conn.execute("""
+                UPDATE jobs SET status = 'running', worker = ?, started_at = ?, updated_at = ?, attempt = attempt + 1
+                WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1)
+                  AND status = 'queued'
+                RETURNING id, session_id, spec, attempt
+            """, (worker, now, now)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "session_id": row[1], "spec": json.loads(row[2]), "worker": worker, "attempt": row[3]}
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Keep worker's claim on a running job alive. False if the job was requeued and the claim is gone."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def set_detail(self, job_id: str, worker: str, detail: Optional[str]) -> None:
+        """Record what a running job is waiting on (rate-limit slot, Firecrawl status) for clients to show."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET detail = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                               (detail, job_id, worker))
+
+    def set_total(self, job_id: str, total: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET total = ?, updated_at = ? WHERE id = ?", (total, time.time(), job_id))
+
+    def add_result(self, job_id: str, worker: str, result: BatchResult) -> None:
+        """Append a URL's result to a job worker is running; raises JobLost if another worker owns it now."""
+        with self._lock:
+            # IMMEDIATE so workers in other processes can't read the same seq
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT done FROM jobs WHERE id = ? AND worker = ? AND status = 'running'", (job_id, worker)
+                ).fetchone()
+                if row is None:
+                    raise JobLost(job_id)
+                seq = row[0]
+                self._conn.execute(
+                    "INSERT INTO job_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, seq, result.url, _pack(result.data), _pack(result.previous), result.error,
+                     result.elapsed, int(result.cached), int(result.unchanged), int(result.local)),
+                )
+                self._conn.execute("UPDATE jobs SET done = done + 1, updated_at = ? WHERE id = ?", (time.time(), job_id))
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def finish(self, job_id: str, worker: str, error: Optional[str] = None) -> bool:
+        """Mark a job worker is running as done. False if another worker owns it now."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                ("failed" if error else "completed", error, now, now, job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            columns = [c[0] for c in cursor.description]
+        if row is None:
+            return None
+        job = dict(zip(columns, row))
+        job["spec"] = json.loads(job["spec"])
+        return job
+
+    def results(self, job_id: str, since: int = 0) -> List[BatchResult]:
+        """Per-URL results of a job in completion order, starting at the since-th one."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, data, previous, error, elapsed, cached, unchanged, local FROM job_results "
+                "WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, since)
+            ).fetchall()
+        return [BatchResult(url, _unpack(data), error, elapsed, bool(cached), _unpack(previous), bool(unchanged), bool(local))
+                for url, data, previous, error, elapsed, cached, unchanged, local in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", *FINISHED_STATUSES)}
+
+    def purge(self, max_age: float = 24 * 60 * 60) -> int:
+        """Delete finished jobs (and their results) older than max_age seconds. Returns how many were removed."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            ids = [(row[0],) for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*FINISHED_STATUSES, cutoff)
+            )]
+            self._conn.executemany("DELETE FROM job_results WHERE job_id = ?", ids)
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", ids)
+        return len(ids)
+
+
+def describe_progress(app) -> Optional[str]:
+    """What a job running with app is waiting on: a rate-limit slot or its Firecrawl extract jobs; None if neither."""
+    position = app.queue_position() if hasattr(app, "queue_position") else None
+    if position:
+        return f"Waiting for a rate-limit slot (position {position} in queue)..."
+    running = SINGLE_FLIGHT.running(app)
+    if len(running) == 1:
+        return running[0].status_message()
+    if running:
+        statuses = Counter(job.status for job in running)
+        return f"{len(running)} Firecrawl extract jobs in flight ({', '.join(f'{n} {s}' for s, n in statuses.items())})"
+    return None
+
+
+def execute_job(store: JobStore, job: Dict[str, Any], app, cache=None, snapshots=None, pages=None,
+                worker: Optional[str] = None, lost: Optional[threading.Event] = None) -> None:
+    """Run one claimed job to completion, recording each URL's result as it finishes.
+
+    spec keys: urls, extract_params, concurrency, use_cache, changes_only, local_first, and
+    optionally crawl ({root_url, include, exclude, max_depth, max_pages}) to discover
+    the URLs first. Pages scraped along the way go through the PageCache pages,
+    unless use_cache is off. Raises JobLost, leaving the rest of the URLs alone,
+    once lost is set or the job turns out to belong to another worker.
+    """
+    from firecrawl_scraper.crawl import CrawlScope, discover_urls
+    from firecrawl_scraper.incremental import run_incremental
+
+    spec = job["spec"]
+    urls = spec["urls"]
+    pages = pages if spec.get("use_cache", True) else None
+    if spec.get("crawl"):
+        crawl = dict(spec["crawl"])
+        max_pages = crawl.pop("max_pages")
+        urls = discover_urls(app, CrawlScope(**crawl), max_pages=max_pages, pages=pages)
+        store.set_total(job["id"], len(urls))
+
+    workers = spec.get("concurrency", DEFAULT_CONCURRENCY)
+    if spec.get("changes_only"):
+        results = run_incremental(app, urls, spec["extract_params"], snapshots, max_workers=workers,
+                                  local_first=spec.get("local_first", False), pages=pages)
+    else:
+        results = run_batch(app, urls, spec["extract_params"], max_workers=workers,
+                            cache=cache, use_cache=spec.get("use_cache", True),
+                            local_first=spec.get("local_first", False), pages=pages)
+    for result in results:
+        if lost is not None and lost.is_set():
+            raise JobLost(job["id"])
+        store.add_result(job["id"], worker or job["worker"], result)
+
+
+class JobQueue:
+    """Pool of worker threads that claim and run jobs from a JobStore.
+
+    Workers are independent of the Streamlit sessions that submit jobs: a job
+    keeps running if its browser tab reruns, refreshes or disconnects, and other
+    processes (python -m firecrawl_scraper worker) can serve the same store.
+    app_factory(session_id) returns the client a job runs with.
+    """
+
+    def __init__(self, store: JobStore, app_factory: Callable[[str], Any], cache=None, snapshots=None,
+                 workers: int = DEFAULT_JOB_WORKERS, pages=None):
+        self.store = store
+        self.app_factory = app_factory
+        self.cache = cache
+        self.snapshots = snapshots
+        self.pages = pages
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Jobs this process is running, each with an event set once its claim has been lost
+        self._running: Dict[str, threading.Event] = {}
+        self._apps: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        # Set on submit so an idle worker in this process starts at once instead of at its next poll
+        self._wakeup = threading.Event()
+        self._threads = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        if workers:
+            self._threads.append(threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True))
+            self._threads.append(threading.Thread(target=self._report, name="job-detail", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, session_id: str, spec: Dict[str, Any]) -> str:
+        job_id = self.store.submit(session_id, spec)
+        self._wakeup.set()
+        return job_id
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def join(self) -> None:
+        """Block until stop() is called from another thread (or the process is interrupted)."""
+        while not self._stop.wait(1.0):
+            pass
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            # A failed beat (e.g. "database is locked") must not end the loop, or the jobs go stale
+            try:
+                for job_id, lost in list(self._running.items()):
+                    if not self.store.heartbeat(job_id, self.worker_id):
+                        logger.warning(f"Worker {self.worker_id} lost job {job_id[:8]}, stopping it")
+                        lost.set()
+            except Exception:
+                logger.exception(f"Heartbeat of worker {self.worker_id} failed, retrying")
+
+    def _report(self) -> None:
+        reported: Dict[str, Optional[str]] = {}
+        while not self._stop.wait(DETAIL_INTERVAL):
+            try:
+                reported = {job_id: reported.get(job_id) for job_id in self._apps}
+                for job_id, app in list(self._apps.items()):
+                    detail = describe_progress(app)
+                    if detail != reported.get(job_id):
+                        self.store.set_detail(job_id, self.worker_id, detail)
+                        reported[job_id] = detail
+            except Exception:
+                logger.exception(f"Progress report of worker {self.worker_id} failed, retrying")
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            job = self.store.claim(self.worker_id)
+            if job is None:
+                self._wakeup.wait(IDLE_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            logger.info(f"Worker {self.worker_id} running job {job['id'][:8]}")
+            lost = self._running[job["id"]] = threading.Event()
+            app = self._apps[job["id"]] = self.app_factory(job["session_id"])
+            try:
+                execute_job(self.store, job, app, self.cache, self.snapshots, self.pages,
+                            worker=self.worker_id, lost=lost)
+            except JobLost:
+                logger.warning(f"Job {job['id'][:8]} was requeued while worker {self.worker_id} ran it; dropped")
+            except Exception as e:
+                logger.exception(f"Job {job['id'][:8]} failed")
+                self.store.finish(job["id"], self.worker_id, error=str(e))
+            else:
+                if not self.store.finish(job["id"], self.worker_id):
+                    logger.warning(f"Job {job['id'][:8]} was requeued while worker {self.worker_id} ran it; dropped")
+            finally:
+                self._running.pop(job["id"], None)
+                self._apps.pop(job["id"], None)
@@ -0,0 +1,283 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from firecrawl_scraper.extraction import start_extraction
+from firecrawl_scraper.metrics import METRICS
+from firecrawl_scraper.pages import PAGE_FORMATS, PageCache, scrape_page
+
+logger = logging.getLogger(__name__)
+
+LOCAL_FIRST = os.getenv("FIRECRAWL_LOCAL_FIRST", "0").lower() in ("1", "true", "yes")
+# Below this confidence the local result is discarded and the remote extract call is made
+DEFAULT_MIN_CONFIDENCE = float(os.getenv("FIRECRAWL_LOCAL_MIN_CONFIDENCE", 0.75))
+# Any page has headings, so a heading match alone is trusted less than a table or a link list
+HEADING_WEIGHT = 0.8
+
+# Schema field names are matched to the parts of a repeated structure by the words they contain
+ROLE_WORDS = {
+    "link": {"link", "links", "url", "urls", "href", "website", "homepage"},
+    "text": {"description", "desc", "details", "detail", "summary", "text", "content", "body", "bio", "excerpt", "about", "snippet"},
+    "title": {"title", "name", "heading", "headline", "project", "product", "post", "article", "label"},
+}
+SCHEMA_TYPES = {"string": "str", "integer": "int", "number": "float", "boolean": "bool"}
+# Prompts made only of these words (plus the field names) ask for nothing the schema doesn't already say
+GENERIC_WORDS = {
+    "a", "all", "an", "and", "any", "are", "as", "each", "every", "extract", "fetch", "find", "for", "from", "get",
+    "give", "grab", "in", "including", "info", "information", "is", "item", "items", "its", "list", "me", "of",
+    "on", "page", "please", "pull", "return", "scrape", "show", "site", "the", "their", "them", "this", "to",
+    "webpage", "website", "with",
+}
+
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(.*)$")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+
+@dataclass
+class LocalExtraction:
+    """Records pulled from a page without an LLM, with the structure they came from."""
+    records: List[Dict[str, Any]]
+    structure: str
+    confidence: float
+
+    def payload(self) -> Dict[str, Any]:
+        """The records shaped like an extract response, so format_extraction_result can read them."""
+        return {
+            "success": True,
+            "status": "completed",
+            "data": self.records,
+            "local": {"structure": self.structure, "confidence": round(self.confidence, 3)},
+        }
+
+
+def _words(name: str) -> List[str]:
+    return re.findall(r"[a-z]+", re.sub(r"([a-z])([A-Z])", r"\1 \2", name).lower())
+
+
+def field_role(name: str) -> Optional[str]:
+    """link, text or title for field names the heuristics understand; None for anything else."""
+    words = set(_words(name))
+    for role in ("link", "text", "title"):
+        if words & ROLE_WORDS[role]:
+            return role
+    return None
+
+
+def generic_prompt(prompt: Optional[str], fields: List[Dict[str, str]]) -> bool:
+    """True if the prompt asks for no more than the schema fields, e.g. "Extract all project titles and links".
+
+    The local engine never reads the prompt, so anything beyond that ("only the ML
+    projects", "from the portfolio section") needs the remote extract call.
+    """
+    known = set(GENERIC_WORDS)
+    for field in fields:
+        known.update(_words(field["name"]))
+        role = field_role(field["name"])
+        if role is not None:
+            known.update(ROLE_WORDS[role])
+    return all(word in known or word.rstrip("s") in known for word in _words(prompt or ""))
+
+
+def fields_from_schema(schema: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Schema builder fields back from a flat JSON schema; empty if it has nested or untyped properties."""
+    properties = (schema or {}).get("properties") or {}
+    fields = []
+    for name, spec in properties.items():
+        type_name = SCHEMA_TYPES.get(spec.get("type"))
+        if type_name is None:
+            return []
+        fields.append({"name": name, "type": type_name})
+    return fields
+
+
+def _plain(text: str) -> str:
+    text = _LINK.sub(r"\1", _IMAGE.sub("", text))
+    text = re.sub(r"[*_`]+", "", text)
+    return re.sub(r"\s+", " ", text).strip(" -–—:|")
+
+
+def _first_link(text: str, base_url: str) -> Optional[str]:
+    for match in _LINK.finditer(_IMAGE.sub("", text)):
+        href = match.group(2)
+        if not href.startswith(("#", "mailto:", "javascript:")):
+            return urljoin(base_url, href)
+    return None
+
+
+def _heading_records(lines: List[str], base_url: str) -> List[Dict[str, Any]]:
+    """One record per heading at the most repeated heading level: its text, first link and first paragraph."""
+    sections: List[Tuple[int, str, List[str]]] = []
+    for line in lines:
+        match = _HEADING.match(line)
+        if match:
+            sections.append((len(match.group(1)), match.group(2), []))
+        elif sections:
+            sections[-1][2].append(line)
+    levels = [level for level, _, _ in sections]
+    if not levels:
+        return []
+    level = max(set(levels), key=lambda lvl: (levels.count(lvl), lvl))
+
+    records = []
+    for i, (section_level, heading, body) in enumerate(sections):
+        if section_level != level:
+            continue
+        # A section runs on through deeper headings until the next one at its level or above
+        for deeper_level, deeper_heading, deeper_body in sections[i + 1:]:
+            if deeper_level <= level:
+                break
+            body = body + [deeper_heading] + deeper_body
+        paragraph = next((_plain(line) for line in body
+                          if _plain(line) and not _TABLE_SEPARATOR.match(line) and not line.lstrip().startswith("|")), "")
+        records.append({
+            "title": _plain(heading),
+            "link": _first_link(heading, base_url) or _first_link("\n".join(body), base_url),
+            "text": paragraph,
+        })
+    return records
+
+
+def _list_records(lines: List[str], base_url: str) -> List[Dict[str, Any]]:
+    """One record per list item that starts with a link: the link text, its target and the rest of the item."""
+    records = []
+    for line in lines:
+        match = _LIST_ITEM.match(line)
+        if not match:
+            continue
+        item = _IMAGE.sub("", match.group(1)).strip()
+        link = _LINK.match(item.lstrip("*_ "))
+        if not link:
+            continue
+        records.append({
+            "title": _plain(link.group(1)),
+            "link": urljoin(base_url, link.group(2)),
+            "text": _plain(item.lstrip("*_ ")[link.end():]),
+        })
+    return records
+
+
+def _table_records(lines: List[str], base_url: str) -> List[List[Dict[str, Any]]]:
+    """Rows of each pipe table on the page, keyed by header; a cell's link is kept under "<header>.link"."""
+    def cells(line):
+        return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+    tables = []
+    i = 0
+    while i + 1 < len(lines):
+        if "|" in lines[i] and _TABLE_SEPARATOR.match(lines[i + 1]):
+            headers = [_plain(h) for h in cells(lines[i])]
+            rows = []
+            i += 2
+            while i < len(lines) and "|" in lines[i] and lines[i].strip():
+                row = {}
+                for header, cell in zip(headers, cells(lines[i])):
+                    row[header] = _plain(cell)
+                    row[f"{header}.link"] = _first_link(cell, base_url)
+                rows.append(row)
+                i += 1
+            tables.append(rows)
+        else:
+            i += 1
+    return tables
+
+
+def _table_column(field: Dict[str, str], headers: List[str]) -> Optional[str]:
+    name = " ".join(_words(field["name"]))
+    for header in headers:
+        if " ".join(_words(header)) == name:
+            return header
+    role = field_role(field["name"])
+    return next((h for h in headers if role is not None and field_role(h) == role), None)
+
+
+def _score(records: List[Dict[str, Any]], fields: List[Dict[str, str]], matched: int) -> float:
+    """Share of fields matched, times share of matched cells filled; single records count half."""
+    if not records or not matched:
+        return 0.0
+    filled = sum(1 for record in records for field in fields if record.get(field["name"]) not in (None, ""))
+    coverage = matched / len(fields)
+    fill = filled / (len(records) * matched)
+    return coverage * fill * (1.0 if len(records) > 1 else 0.5)
+
+
+def extract_local(page: Dict[str, Any], fields: List[Dict[str, str]], base_url: str = "") -> Optional[LocalExtraction]:
+    """Fill the schema fields from a scraped page's repeated structures, or None if nothing fits.
+
+    Candidates are pipe tables (columns matched to fields by name or role), headings
+    with the text under them, and link lists. Fields are mapped to link / text / title
+    roles by name (Project_link, Details, Project_title), so only simple string
+    schemas match headings and lists; numeric and boolean fields need a table.
+    The candidate with the highest confidence wins.
+    """
+    lines = (page.get("markdown") or "").splitlines()
+    fields = [f for f in fields if f.get("name", "").strip()]
+    if not lines or not fields:
+        return None
+    candidates = []
+
+    for rows in _table_records(lines, base_url):
+        headers = [h for h in rows[0] if not h.endswith(".link")] if rows else []
+        columns = {f["name"]: _table_column(f, headers) for f in fields}
+        records = []
+        for row in rows:
+            record = {}
+            for field in fields:
+                column = columns[field["name"]]
+                if column is None:
+                    record[field["name"]] = None
+                elif field_role(field["name"]) == "link":
+                    record[field["name"]] = row.get(f"{column}.link") or row.get(column)
+                else:
+                    record[field["name"]] = row.get(column)
+            records.append(record)
+        matched = sum(1 for column in columns.values() if column is not None)
+        candidates.append(LocalExtraction(records, "table", _score(records, fields, matched)))
+
+    roles = {f["name"]: field_role(f["name"]) if f["type"] == "str" else None for f in fields}
+    matched = sum(1 for role in roles.values() if role is not None)
+    for structure, parts in (("headings", _heading_records(lines, base_url)), ("links", _list_records(lines, base_url))):
+        records = [{name: part.get(role) if role else None for name, role in roles.items()} for part in parts]
+        weight = HEADING_WEIGHT if structure == "headings" else 1.0
+        candidates.append(LocalExtraction(records, structure, _score(records, fields, matched) * weight))
+
+    best = max(candidates, key=lambda c: c.confidence)
+    return best if best.records else None
+
+
+def extract_page(app, url: str, extract_params: Dict[str, Any], timeout: Optional[float] = None,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE, pages: Optional[PageCache] = None) -> Tuple[Any, bool]:
+    """Extract one URL locally from a markdown scrape if the schema and prompt allow, else with a remote extract job.
+
+    Returns (payload, local). Scrape failures and low-confidence local results fall
+    back to the remote call, so the outcome is never worse than extract alone. With
+    a PageCache, the scrape is served from it when the page was fetched recently.
+    Either way, a flat schema's data comes back as a list of records.
+    """
+    fields = fields_from_schema(extract_params.get("schema"))
+    if fields and not generic_prompt(extract_params.get("prompt"), fields):
+        logger.info(f"Prompt for {url} asks for more than the schema, calling extract")
+    elif fields:
+        with METRICS.timer("local_extract"):
+            try:
+                page = scrape_page(app, url, pages, PAGE_FORMATS)
+            except Exception as e:
+                logger.warning(f"Could not scrape {url} for local extraction: {e}")
+                page = None
+            extraction = extract_local(page or {}, fields, url)
+        if extraction is not None and extraction.confidence >= min_confidence:
+            logger.info(f"Extracted {len(extraction.records)} rows from {url} locally "
+                        f"({extraction.structure}, confidence {extraction.confidence:.2f})")
+            return extraction.payload(), True
+        logger.info(f"Local extraction of {url} not confident enough "
+                    f"({extraction.confidence if extraction else 0:.2f}), calling extract")
+    payload = start_extraction(app, [url], extract_params).result(timeout)
+    # A flat object schema gets one object back; list it like the local records
+    if fields and isinstance(payload, dict) and isinstance(payload.get("data"), dict):
+        payload = {**payload, "data": [payload["data"]]}
+    return payload, False
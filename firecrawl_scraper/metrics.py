@@ -0,0 +1,187 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv("FIRECRAWL_METRICS_PORT", 0))
+METRICS_FILE = os.getenv("FIRECRAWL_METRICS_FILE")
+METRICS_FILE_INTERVAL = 15.0
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = tuple(2 ** exponent for exponent in range(8, 28, 2))  # 256 B .. 32 MB
+STAGE_SECONDS = "firecrawl_stage_duration_seconds"
+PAYLOAD_BYTES = "firecrawl_payload_bytes"
+RESULT_ROWS = "firecrawl_result_rows"
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+_HELP = {
+    STAGE_SECONDS: "Time spent per chat-turn stage",
+    PAYLOAD_BYTES: "Size of Firecrawl responses and formatted results",
+    RESULT_ROWS: "Rows per formatted result",
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, with quantile estimates."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside its bucket, like histogram_quantile()."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Process-wide histograms keyed by metric name and a single label set."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._buckets = {STAGE_SECONDS: LATENCY_BUCKETS, PAYLOAD_BYTES: SIZE_BUCKETS, RESULT_ROWS: ROW_BUCKETS}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Record the wall time of the with-block under firecrawl_stage_duration_seconds{stage=...}."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - started, stage=stage)
+
+    def summary(self, name: str = STAGE_SECONDS) -> Dict[str, Dict[str, float]]:
+        """Count, mean, p50 and p95 per label set of one metric, for display."""
+        with self._lock:
+            items = [(labels, h) for (metric, labels), h in self._histograms.items() if metric == name]
+            return {
+                ",".join(v for _, v in labels): {
+                    "count": h.count,
+                    "mean": h.sum / h.count,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                }
+                for labels, h in sorted(items) if h.count
+            }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            names = sorted({name for name, _ in self._histograms})
+            for name in names:
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), h in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    prefix = f"{label_text}," if label_text else ""
+                    suffix = f"{{{label_text}}}" if label_text else ""
+                    cumulative = 0
+                    for bound, count in zip(self.buckets_for(name), h.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {h.count}')
+                    lines.append(f"{name}_sum{suffix} {h.sum:.6f}")
+                    lines.append(f"{name}_count{suffix} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def buckets_for(self, name: str) -> Sequence[float]:
+        return self._buckets.get(name, LATENCY_BUCKETS)
+
+    def write(self, path: str) -> None:
+        """Write the exposition atomically, e.g. for node_exporter's textfile collector."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(self.render_prometheus())
+        tmp.replace(target)
+
+
+METRICS = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = METRICS.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+def _write_periodically(path: str, interval: float) -> None:
+    while True:
+        try:
+            METRICS.write(path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+        time.sleep(interval)
+
+
+def start_exporters(port: int = METRICS_PORT, path: Optional[str] = METRICS_FILE,
+                    interval: float = METRICS_FILE_INTERVAL) -> Dict[str, object]:
+    """Start the configured exporters: an HTTP /metrics endpoint and/or a textfile rewritten every interval seconds."""
+    exporters: Dict[str, object] = {}
+    if port:
+        exporters["server"] = start_metrics_server(port)
+    if path:
+        thread = threading.Thread(target=_write_periodically, args=(path, interval), name="metrics-textfile", daemon=True)
+        thread.start()
+        exporters["textfile"] = path
+    return exporters
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
@@ -0,0 +1,261 @@
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urljoin, urlsplit
+
+from firecrawl_scraper.cache import normalize_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGES_PATH = os.getenv("FIRECRAWL_PAGE_CACHE_PATH", ".cache/pages.sqlite3")
+DEFAULT_PAGE_TTL = float(os.getenv("FIRECRAWL_PAGE_TTL", 60 * 60))
+DEFAULT_PAGES_MAX_BYTES = int(os.getenv("FIRECRAWL_PAGE_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+# Expired pages are kept this long as revalidation candidates before being dropped outright
+MAX_STALE = 7 * 24 * 60 * 60
+VALIDATOR_TIMEOUT = 10.0
+MAX_VALIDATOR_REDIRECTS = 5
+# Every scrape asks for all of these, so one fetch serves local extraction, fingerprints and crawling
+PAGE_FORMATS = ("markdown", "links")
+
+
+def is_public_url(url: str) -> bool:
+    """True if url is http(s) and every address its host resolves to is publicly routable.
+
+    URLs come from users, so the server itself must not be made to request
+    loopback, private or link-local addresses (its own network, cloud metadata).
+    """
+    parsed = urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return False
+    try:
+        infos = socket.getaddrinfo(parsed.hostname, parsed.port or 443, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0].split("%")[0]).is_global for info in infos)
+
+
+def page_validators(url: str, headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """Status, ETag and Last-Modified of url from a HEAD request, or None if the request failed or wasn't allowed.
+
+    Redirects are followed by hand so every hop goes through is_public_url.
+    """
+    import requests
+
+    for _ in range(MAX_VALIDATOR_REDIRECTS + 1):
+        if not is_public_url(url):
+            logger.debug(f"Not sending HEAD to {url}: not a public address")
+            return None
+        try:
+            response = requests.head(url, allow_redirects=False, timeout=VALIDATOR_TIMEOUT, headers=headers)
+        except requests.RequestException as e:
+            logger.debug(f"HEAD {url} failed: {e}")
+            return None
+        if not response.is_redirect:
+            break
+        url = urljoin(url, response.headers["Location"])
+    else:
+        return None
+    return {
+        "status": response.status_code,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def scrape_validators(page: Any) -> Dict[str, Optional[str]]:
+    """ETag and Last-Modified of a scraped page, when Firecrawl passed them on in its metadata."""
+    metadata = (page or {}).get("metadata") or {} if isinstance(page, dict) else {}
+    # Header names come through in several spellings (ETag, etag, last-modified, lastModified)
+    values = {str(k).lower().replace("-", "").replace("_", ""): v for k, v in metadata.items()}
+
+    def first(value):
+        value = value[0] if isinstance(value, list) and value else value
+        return value if isinstance(value, str) and value else None
+
+    return {"etag": first(values.get("etag")), "last_modified": first(values.get("lastmodified"))}
+
+
+class PageCache:
+    """Disk-backed (SQLite) cache of scraped pages (markdown and links), keyed by canonical URL.
+
+    Pages are stored as zlib-compressed JSON, evicted least recently used first
+    over max_bytes. After ttl a page is not re-scraped straight away: if the
+    scrape's metadata carried an ETag or Last-Modified, a conditional HEAD to the
+    site itself (public addresses only) decides whether the stored copy is still good.
+    """
+
+    def __init__(self, path: str = DEFAULT_PAGES_PATH, ttl: float = DEFAULT_PAGE_TTL,
+                 max_bytes: int = DEFAULT_PAGES_MAX_BYTES, revalidate: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.revalidate = revalidate
+        self._lock = threading.Lock()
+        # One fetch per URL at a time; concurrent callers for the same page wait and reuse it.
+        # A lock lives as long as some caller holds it, whether or not it has acquired it yet
+        self._fetch_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                formats TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+        """)
+
+    def _fetch_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            lock = self._fetch_locks.get(url)
+            if lock is None:
+                lock = self._fetch_locks[url] = threading.Lock()
+            return lock
+
+    def fetch(self, app, url: str, formats: Iterable[str] = PAGE_FORMATS, fresh: bool = False) -> Any:
+        """The scraped page for url: from the cache while fresh or revalidated, otherwise scraped and stored.
+
+        fresh=True always scrapes (and stores the result), for callers that must see the page as it is now.
+        """
+        key = normalize_url(url)
+        formats = sorted(set(PAGE_FORMATS) | set(formats))
+        with self._fetch_lock(key):
+            now = time.time()
+            row = None
+            if not fresh:
+                with self._lock:
+                    row = self._conn.execute(
+                        "SELECT formats, payload, etag, last_modified, fetched_at FROM pages WHERE url = ?", (key,)
+                    ).fetchone()
+            if row is not None and set(formats) <= set(json.loads(row[0])):
+                if now - row[4] <= self.ttl:
+                    self._touch(key, now, hits=1)
+                    return json.loads(zlib.decompress(row[1]))
+                if self._still_valid(url, row[2], row[3]):
+                    self._touch(key, now, revalidated=1, fetched_at=now)
+                    return json.loads(zlib.decompress(row[1]))
+
+            page = app.scrape_url(url, params={"formats": formats})
+            # From the scrape itself: a HEAD of our own here would put a second request to the site on every miss
+            self.set(url, page, formats, scrape_validators(page))
+            with self._lock:
+                self._bump(misses=1)
+            return page
+
+    def _still_valid(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        if not self.revalidate or not (etag or last_modified):
+            return False
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        current = page_validators(url, headers)
+        if current is None or current["status"] >= 400:
+            return False
+        if current["status"] == 304:
+            return True
+        # Servers that ignore conditional headers still tell us via the validators themselves
+        if etag and current["etag"]:
+            return current["etag"].removeprefix("W/") == etag.removeprefix("W/")
+        return bool(last_modified) and current["last_modified"] == last_modified
+
+    def _touch(self, key: str, now: float, fetched_at: Optional[float] = None, **counters: float) -> None:
+        with self._lock:
+            if fetched_at is None:
+                self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, key))
+            else:
+                self._conn.execute("UPDATE pages SET last_access = ?, fetched_at = ? WHERE url = ?", (now, fetched_at, key))
+            self._bump(**counters)
+
+    def get(self, url: str) -> Optional[Any]:
+        """The stored page for url however old it is, without fetching or counting a hit; None if absent."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM pages WHERE url = ?", (normalize_url(url),)).fetchone()
+        return None if row is None else json.loads(zlib.decompress(row[0]))
+
+    def set(self, url: str, page: Any, formats: Iterable[str], validators: Dict[str, Any]) -> None:
+        """Store a scraped page and evict long-expired / least recently used pages over the size bound."""
+        blob = zlib.compress(json.dumps(page, separators=(",", ":")).encode())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), json.dumps(sorted(formats)), blob, len(blob),
+                 validators.get("etag"), validators.get("last_modified"), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.ttl - MAX_STALE,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY last_access"):
+            victims.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", victims)
+
+    def _bump(self, **deltas: float) -> None:
+        self._conn.executemany(
+            "INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            deltas.items(),
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit / revalidated / miss counts and current size."""
+        with self._lock:
+            values = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        hits, revalidated, misses = (int(values.get(name, 0)) for name in ("hits", "revalidated", "misses"))
+        requests = hits + revalidated + misses
+        return {
+            "hits": hits,
+            "revalidated": revalidated,
+            "misses": misses,
+            "hit_rate": (hits + revalidated) / requests if requests else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM stats")
+
+
+def scrape_page(app, url: str, pages: Optional[PageCache] = None, formats: Iterable[str] = PAGE_FORMATS,
+                fresh: bool = False) -> Any:
+    """Scrape url through the page cache if there is one, straight from Firecrawl otherwise.
+
+    With fresh=True the cached copy is not read, but the new scrape still replaces it.
+    """
+    if pages is not None:
+        return pages.fetch(app, url, formats, fresh=fresh)
+    return app.scrape_url(url, params={"formats": list(formats)})
@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+PROFILE_ENABLED = os.getenv("FIRECRAWL_PROFILE", "").lower() in ("1", "true", "yes")
+PROFILE_KEEP = int(os.getenv("FIRECRAWL_PROFILE_KEEP", 20))
+SAMPLE_INTERVAL = float(os.getenv("FIRECRAWL_PROFILE_INTERVAL", 0.005))
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sample one thread's Python stack every interval seconds from a background thread.
+
+    Unlike cProfile, the profiled thread runs untouched (no per-call hooks), and
+    the result is a set of whole stacks, which is what flame graphs are drawn from.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+@dataclass
+class Profile:
+    """Stack samples of one rerun or extraction turn, tagged with the session's size at the time."""
+    kind: str
+    label: str
+    started_at: float
+    seconds: float
+    samples: Counter
+    tags: Dict[str, int] = field(default_factory=dict)
+    interval: float = SAMPLE_INTERVAL
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format ("a;b;c count" per line), for flamegraph.pl or speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def filename(self) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        return f"profile-{self.kind}-{self.label}-{stamp}.folded"
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the samples, which is dominated by the stack strings."""
+        return sum(len(stack) + 8 for stack in self.samples)
+
+    def describe(self) -> str:
+        tags = ", ".join(f"{v} {k}" for k, v in self.tags.items())
+        return f"{self.kind} {self.label}: {self.seconds * 1000:.0f}ms ({tags})"
+
+
+class ProfileRing:
+    """The last max_profiles profiles of a session, oldest dropped first."""
+
+    def __init__(self, max_profiles: int = PROFILE_KEEP):
+        self.profiles: Deque[Profile] = deque(maxlen=max_profiles)
+
+    def add(self, profile: Profile) -> None:
+        self.profiles.append(profile)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def latest_first(self) -> List[Profile]:
+        return list(reversed(self.profiles))
+
+    def nbytes(self) -> int:
+        return sum(profile.nbytes() for profile in self.profiles)
@@ -0,0 +1,281 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+from firecrawl_scraper.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_PER_MINUTE = float(os.getenv("FIRECRAWL_RATE_PER_MINUTE", 100))
+DEFAULT_BURST = int(os.getenv("FIRECRAWL_RATE_BURST", 10))
+# Extract status polls are free but still rate limited, so they get a bucket of their own
+DEFAULT_STATUS_RATE_PER_MINUTE = float(os.getenv("FIRECRAWL_STATUS_RATE_PER_MINUTE", 60))
+DEFAULT_GLOBAL_BUDGET = float(os.getenv("FIRECRAWL_CREDIT_BUDGET", 5000))
+DEFAULT_SESSION_BUDGET = float(os.getenv("FIRECRAWL_SESSION_CREDIT_BUDGET", 1000))
+# Budgets are spent over a rolling window and refill when it ends
+DEFAULT_BUDGET_WINDOW = float(os.getenv("FIRECRAWL_BUDGET_WINDOW", 24 * 60 * 60))
+# Shared by the app and every `python -m firecrawl_scraper worker` on the host, so they spend one rate and budget
+DEFAULT_RATELIMIT_PATH = os.getenv("FIRECRAWL_RATELIMIT_PATH", ".cache/ratelimit.sqlite3")
+# Spend rows are keyed by session; this one holds the server-wide total
+GLOBAL_SESSION = "*"
+
+# Approximate credits charged per call; extract is billed per URL
+CREDIT_COSTS = {
+    "extract": float(os.getenv("FIRECRAWL_EXTRACT_CREDITS", 5)),
+    "scrape": 1.0,
+    "map": 1.0,
+}
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised instead of calling Firecrawl when a call would exceed a credit budget."""
+
+
+class RateLimitStore:
+    """Token buckets and credit spend kept in SQLite, shared by every process that opens the same file.
+
+    Without it, each worker process would get its own bucket and budgets, and
+    adding workers would multiply the API key's effective rate. Times are wall
+    clock so processes agree on them. ":memory:" keeps the state private to one process.
+    """
+
+    def __init__(self, path: str = DEFAULT_RATELIMIT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS spent (
+                session_id TEXT PRIMARY KEY,
+                credits REAL NOT NULL,
+                window_started REAL NOT NULL
+            );
+        """)
+
+    def _transaction(self, work):
+        with self._lock:
+            # IMMEDIATE so two processes can't both read the same tokens or spend
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(time.time())
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def take(self, name: str, rate: float, capacity: float, tokens: float = 1.0) -> float:
+        """Take tokens from the named bucket. Returns 0 if they were taken, else the seconds until they will be."""
+        def work(now):
+            row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+            available = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            wait = 0.0 if available >= tokens else (tokens - available) / rate
+            if not wait:
+                available -= tokens
+            self._conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (name, available, now))
+            return wait
+        return self._transaction(work)
+
+    def _spent(self, session_id: str, now: float, window: float) -> float:
+        row = self._conn.execute("SELECT credits, window_started FROM spent WHERE session_id = ?", (session_id,)).fetchone()
+        return 0.0 if row is None or now - row[1] >= window else row[0]
+
+    def _add(self, session_id: str, credits: float, now: float, window: float) -> None:
+        # A refund (negative credits) never takes spend below zero, and an expired window starts over
+        self._conn.execute("""
+            INSERT INTO spent VALUES (:session, MAX(0, :credits), :now) ON CONFLICT(session_id) DO UPDATE SET
+                credits = MAX(0, CASE WHEN :now - window_started >= :window THEN 0 ELSE credits END + :credits),
+                window_started = CASE WHEN :now - window_started >= :window THEN :now ELSE window_started END
+        """, {"session": session_id, "credits": credits, "now": now, "window": window})
+
+    def charge(self, session_id: str, credits: float, session_budget: float, global_budget: float,
+               window: float) -> None:
+        """Record credits against the session and the server, or raise BudgetExceeded if either budget would overflow."""
+        def work(now):
+            if self._spent(GLOBAL_SESSION, now, window) + credits > global_budget:
+                raise BudgetExceeded(f"Global credit budget of {global_budget:.0f} exhausted; try again later")
+            if self._spent(session_id, now, window) + credits > session_budget:
+                raise BudgetExceeded(f"Session credit budget of {session_budget:.0f} exhausted")
+            self._add(session_id, credits, now, window)
+            self._add(GLOBAL_SESSION, credits, now, window)
+        self._transaction(work)
+
+    def refund(self, session_id: str, credits: float, window: float) -> None:
+        def work(now):
+            self._add(session_id, -credits, now, window)
+            self._add(GLOBAL_SESSION, -credits, now, window)
+        self._transaction(work)
+
+    def spent(self, session_id: str, window: float) -> float:
+        """Credits spent by session_id (GLOBAL_SESSION for the whole server) in its current window."""
+        with self._lock:
+            return self._spent(session_id, time.time(), window)
+
+
+class FairRateLimiter:
+    """Shared token bucket with round-robin queuing per session and credit budgets.
+
+    Callers wait in a per-session FIFO; sessions take turns, so one session queueing
+    hundreds of calls delays another session's next call by at most one call per
+    waiting session. Credits are checked (and charged) before a caller queues, against
+    both its session budget and the global budget. The bucket and the spend live in a
+    RateLimitStore, so processes sharing its file share the rate and budgets; the
+    turn-taking is per process.
+    """
+
+    def __init__(self, rate_per_minute: float = DEFAULT_RATE_PER_MINUTE, burst: int = DEFAULT_BURST,
+                 global_budget: float = DEFAULT_GLOBAL_BUDGET, session_budget: float = DEFAULT_SESSION_BUDGET,
+                 budget_window: float = DEFAULT_BUDGET_WINDOW, store: Optional[RateLimitStore] = None,
+                 status_rate_per_minute: float = DEFAULT_STATUS_RATE_PER_MINUTE):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.status_rate = status_rate_per_minute / 60
+        self.global_budget = global_budget
+        self.session_budget = session_budget
+        self.budget_window = budget_window
+        self.store = store or RateLimitStore(":memory:")
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[object]] = defaultdict(deque)
+        # Sessions with waiting callers, in the order they get their next turn
+        self._rotation: Deque[str] = deque()
+        self.granted = 0
+
+    def acquire(self, session_id: str, credits: float = 1.0) -> None:
+        """Charge credits to the session, then block until it is this caller's turn and a token is free."""
+        ticket = object()
+        with self._cond:
+            self.store.charge(session_id, credits, self.session_budget, self.global_budget, self.budget_window)
+            queue = self._queues[session_id]
+            queue.append(ticket)
+            if session_id not in self._rotation:
+                self._rotation.append(session_id)
+
+            try:
+                while True:
+                    my_turn = self._rotation[0] == session_id and queue[0] is ticket
+                    wait = self.store.take("calls", self.rate, self.burst) if my_turn else None
+                    if wait == 0:
+                        self.granted += 1
+                        return
+                    # Only the caller at the head sleeps on the bucket; everyone else waits for a turn change
+                    self._cond.wait(max(wait, 0.001) if my_turn else None)
+            except BaseException:
+                # e.g. the shared store's file was locked; the call is never made, so give its credits back
+                try:
+                    self.store.refund(session_id, credits, self.budget_window)
+                except Exception as e:
+                    logger.warning(f"Could not refund {credits} credits to session {session_id[:8]}: {e}")
+                raise
+            finally:
+                self._leave(session_id, ticket)
+
+    def _leave(self, session_id: str, ticket: object) -> None:
+        """Take a granted or abandoned ticket out of the queues and hand the turn on. Caller holds _cond."""
+        queue = self._queues[session_id]
+        at_head = queue[0] is ticket
+        queue.remove(ticket)
+        if at_head and self._rotation and self._rotation[0] == session_id:
+            self._rotation.popleft()
+            if queue:
+                self._rotation.append(session_id)
+        if not queue:
+            del self._queues[session_id]
+            if session_id in self._rotation:
+                self._rotation.remove(session_id)
+        self._cond.notify_all()
+
+    def acquire_status(self) -> None:
+        """Block until the status-poll bucket has a token. Polls cost no credits and skip the session turns.
+
+        Many extract jobs in flight thus share one poll rate instead of each polling every second.
+        """
+        while True:
+            wait = self.store.take("status", self.status_rate, self.burst)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def refund(self, session_id: str, credits: float) -> None:
+        """Give back credits charged for a call that failed before Firecrawl billed it."""
+        self.store.refund(session_id, credits, self.budget_window)
+
+    def queue_position(self, session_id: str) -> Optional[int]:
+        """1-based position of the session's next call in the round-robin order, or None if it has none waiting."""
+        with self._cond:
+            try:
+                return self._rotation.index(session_id) + 1
+            except ValueError:
+                return None
+
+    def stats(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        with self._cond:
+            stats = {
+                "waiting": sum(len(q) for q in self._queues.values()),
+                "sessions_waiting": len(self._rotation),
+                "granted": self.granted,
+                "global_remaining": max(0.0, self.global_budget - self.store.spent(GLOBAL_SESSION, self.budget_window)),
+            }
+            if session_id is not None:
+                stats["session_remaining"] = max(0.0, self.session_budget - self.store.spent(session_id, self.budget_window))
+                stats["session_waiting"] = len(self._queues.get(session_id, ()))
+        stats["queue_position"] = self.queue_position(session_id) if session_id is not None else None
+        return stats
+
+
+class LimitedApp:
+    """Per-session view of a shared FirecrawlApp whose billable calls go through a FairRateLimiter.
+
+    Extract status polls go through the limiter's separate status bucket; everything
+    else (attributes, unbilled calls) is delegated to the wrapped client.
+    """
+
+    def __init__(self, app, limiter: FairRateLimiter, session_id: str):
+        self.app = app
+        self.limiter = limiter
+        self.session_id = session_id
+
+    def __getattr__(self, name):
+        return getattr(self.app, name)
+
+    def queue_position(self) -> Optional[int]:
+        return self.limiter.queue_position(self.session_id)
+
+    def _call(self, credits: float, method, *args, **kwargs):
+        with METRICS.timer("rate_limit_wait"):
+            self.limiter.acquire(self.session_id, credits)
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            self.limiter.refund(self.session_id, credits)
+            raise
+
+    def async_extract(self, urls, params=None, *args, **kwargs):
+        credits = CREDIT_COSTS["extract"] * max(1, len(urls or ()))
+        return self._call(credits, self.app.async_extract, urls, params, *args, **kwargs)
+
+    def extract(self, urls, params=None, *args, **kwargs):
+        credits = CREDIT_COSTS["extract"] * max(1, len(urls or ()))
+        return self._call(credits, self.app.extract, urls, params, *args, **kwargs)
+
+    def get_extract_status(self, job_id):
+        with METRICS.timer("rate_limit_wait"):
+            self.limiter.acquire_status()
+        return self.app.get_extract_status(job_id)
+
+    def scrape_url(self, url, params=None):
+        return self._call(CREDIT_COSTS["scrape"], self.app.scrape_url, url, params)
+
+    def map_url(self, url, params=None):
+        return self._call(CREDIT_COSTS["map"], self.app.map_url, url, params)
@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List
+
+from firecrawl_scraper.history import ChatHistory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET = int(os.getenv("FIRECRAWL_MEMORY_BUDGET_BYTES", 512 * 1024 * 1024))
+# Sessions untouched this long are compacted first when the server is over budget
+DEFAULT_IDLE_AFTER = float(os.getenv("FIRECRAWL_SESSION_IDLE_SECONDS", 10 * 60))
+# ...and have their results dropped altogether after this long, even under budget
+DEFAULT_EXPIRE_AFTER = float(os.getenv("FIRECRAWL_SESSION_EXPIRE_SECONDS", 2 * 60 * 60))
+CHECK_INTERVAL = 5.0
+
+
+class SessionRegistry:
+    """Server-wide index of the live sessions' chat histories, kept under one memory budget.
+
+    Histories are held by weak reference, so sessions Streamlit has closed drop out
+    by themselves. enforce() first expires the results of sessions idle for longer
+    than expire_after. Then, while the sessions' memory (result tables, chat text,
+    and the profiles and live job tables the app reports) adds up to more than
+    budget_bytes, it spills idle sessions' tables to disk, longest idle first, and
+    after that the older tables of active sessions; their newest result stays.
+    Only result tables can be spilled, so the rest may keep the total over budget.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_MEMORY_BUDGET, idle_after: float = DEFAULT_IDLE_AFTER,
+                 expire_after: float = DEFAULT_EXPIRE_AFTER, check_interval: float = CHECK_INTERVAL):
+        self.budget_bytes = budget_bytes
+        self.idle_after = idle_after
+        self.expire_after = expire_after
+        self.check_interval = check_interval
+        self._sessions: "weakref.WeakValueDictionary[str, ChatHistory]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._enforcing = threading.Lock()
+        self._last_check = 0.0
+        self._compacted = 0
+        self._expired = 0
+        self._freed_bytes = 0
+
+    def register(self, history: ChatHistory) -> None:
+        with self._lock:
+            self._sessions[history.session_id] = history
+
+    def _histories(self) -> List[ChatHistory]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def usage(self) -> List[Dict[str, Any]]:
+        """Result rows, bytes in memory (all of it, and result tables alone) and idle time of every live session, largest first."""
+        now = time.time()
+        sessions = []
+        for history in self._histories():
+            stats = history.stats()
+            sessions.append({
+                "session_id": history.session_id,
+                "rows": stats["rows"],
+                "bytes": history.memory_bytes(),
+                "result_bytes": stats["in_memory_bytes"],
+                "spilled_bytes": stats["spilled_bytes"],
+                "idle_seconds": now - history.last_active,
+            })
+        return sorted(sessions, key=lambda s: s["bytes"], reverse=True)
+
+    def enforce(self, force: bool = False) -> None:
+        """Expire long-idle sessions and compact results until the budget holds; at most every check_interval."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+        # One pass at a time; sessions arriving meanwhile just skip it
+        if not self._enforcing.acquire(blocking=False):
+            return
+        try:
+            histories = sorted(self._histories(), key=lambda h: h.last_active)
+            idle = [h for h in histories if now - h.last_active > self.idle_after]
+            for history in idle:
+                if now - history.last_active > self.expire_after and history.result_indices():
+                    self._record(history, history.expire(), expired=True)
+
+            total = sum(h.memory_bytes() for h in histories)
+            for keep_newest, candidates in ((False, idle), (True, histories)):
+                for history in candidates:
+                    if total <= self.budget_bytes:
+                        return
+                    freed = history.compact(keep_newest)
+                    if freed:
+                        total -= freed
+                        self._record(history, freed)
+            if total > self.budget_bytes:
+                logger.warning(f"Session memory ({total / 1024 / 1024:.0f} MB) still exceeds the "
+                               f"{self.budget_bytes / 1024 / 1024:.0f} MB budget; only newest results are left")
+        finally:
+            self._enforcing.release()
+
+    def _record(self, history: ChatHistory, freed: int, expired: bool = False) -> None:
+        action = "Expired" if expired else "Compacted"
+        logger.info(f"{action} results of session {history.session_id[:8]} "
+                    f"(idle {time.time() - history.last_active:.0f}s), freeing {freed / 1024:.0f} KB")
+        with self._lock:
+            if expired:
+                self._expired += 1
+            else:
+                self._compacted += 1
+            self._freed_bytes += freed
+
+    def stats(self) -> Dict[str, float]:
+        """Return session counts, memory held against the budget and what enforce() has reclaimed so far."""
+        sessions = self.usage()
+        with self._lock:
+            return {
+                "sessions": len(sessions),
+                "idle": sum(1 for s in sessions if s["idle_seconds"] > self.idle_after),
+                "rows": sum(s["rows"] for s in sessions),
+                "bytes": sum(s["bytes"] for s in sessions),
+                "result_bytes": sum(s["result_bytes"] for s in sessions),
+                "budget_bytes": self.budget_bytes,
+                "compacted": self._compacted,
+                "expired": self._expired,
+                "freed_bytes": self._freed_bytes,
+            }
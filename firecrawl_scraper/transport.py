@@ -0,0 +1,170 @@
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+from firecrawl import FirecrawlApp
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from firecrawl_scraper.metrics import METRICS, PAYLOAD_BYTES, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.getenv("FIRECRAWL_POOL_SIZE", 32))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("FIRECRAWL_CONNECT_TIMEOUT", 5.0))
+DEFAULT_READ_TIMEOUT = float(os.getenv("FIRECRAWL_READ_TIMEOUT", 60.0))
+DEFAULT_MAX_RETRIES = int(os.getenv("FIRECRAWL_MAX_RETRIES", 4))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# Longest Retry-After we are willing to sleep for before giving up on a request
+RETRY_AFTER_MAX = 120.0
+
+# Gateway errors and rate limits mean the request was not processed, so even POSTs are safe
+# to resend. A 500 or a read timeout might have been processed, so only idempotent calls retry those.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_RETRY_STATUSES = RETRY_STATUSES | {500}
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "DELETE"})
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), if present."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def never_sent(error: requests.RequestException) -> bool:
+    """True if the request failed while connecting (refused, DNS, connect timeout), so none of it was sent.
+
+    A dropped connection or read timeout after that may leave the server processing it.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter; a server-supplied Retry-After is a lower bound."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        # A little jitter on top keeps clients told the same Retry-After from returning in lockstep
+        delay = retry_after + random.uniform(0, BACKOFF_BASE)
+    return delay
+
+
+class PooledFirecrawlApp(FirecrawlApp):
+    """FirecrawlApp that sends every request through one pooled requests.Session.
+
+    Connections are kept alive and reused across threads and Streamlit sessions,
+    every request has connect/read timeouts, and rate limits (429) and transient
+    server errors are retried with jittered exponential backoff that honors
+    Retry-After. The SDK's own _post/_get/_delete helpers are replaced; scrape_url
+    and map_url, which post directly, are re-routed through them too.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, api_url: Optional[str] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES):
+        super().__init__(api_key=api_key, api_url=api_url)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    def _request(self, method: str, url: str, read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        idempotent = method in IDEMPOTENT_METHODS
+        retry_statuses = IDEMPOTENT_RETRY_STATUSES if idempotent else RETRY_STATUSES
+        timeout = (self.timeout[0], read_timeout or self.timeout[1])
+        attempt = 0
+        while True:
+            self._bump("requests")
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # A connect failure never reached the server; a POST dropped after that (e.g. an extract) may
+                # already be running and billed, so only idempotent calls retry those
+                retryable = idempotent or never_sent(e)
+                if not retryable or attempt >= self.max_retries:
+                    self._bump("failures")
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{method} {url} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            else:
+                METRICS.observe(STAGE_SECONDS, time.perf_counter() - started, stage="firecrawl_http")
+                if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                    METRICS.observe(PAYLOAD_BYTES, len(response.content), stage="firecrawl_response")
+                    return response
+                retry_after = retry_after_seconds(response)
+                if retry_after is not None and retry_after > RETRY_AFTER_MAX:
+                    return response
+                delay = backoff_delay(attempt, retry_after)
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+                response.close()
+            self._bump("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def _bump(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def transport_stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _post_request(self, url: str, data: Dict[str, Any], headers: Dict[str, str],
+                      retries: int = 3, backoff_factor: float = 0.5) -> requests.Response:
+        # The SDK's "timeout" param is the server-side budget in milliseconds; wait a little longer than that
+        read_timeout = data["timeout"] / 1000 + 5 if "timeout" in data else None
+        return self._request("POST", url, read_timeout=read_timeout, headers=headers, json=data)
+
+    def _get_request(self, url: str, headers: Dict[str, str],
+                     retries: int = 3, backoff_factor: float = 0.5) -> requests.Response:
+        return self._request("GET", url, headers=headers)
+
+    def _delete_request(self, url: str, headers: Dict[str, str],
+                        retries: int = 3, backoff_factor: float = 0.5) -> requests.Response:
+        return self._request("DELETE", url, headers=headers)
+
+    def _post_json(self, endpoint: str, payload: Dict[str, Any], action: str) -> Dict[str, Any]:
+        response = self._post_request(f"{self.api_url}{endpoint}", payload, self._prepare_headers())
+        if response.status_code != 200:
+            self._handle_error(response, action)
+        try:
+            body = response.json()
+        except ValueError:
+            raise Exception("Failed to parse Firecrawl response as JSON.")
+        if not body.get("success"):
+            raise Exception(f"Failed to {action}. Error: {body.get('error', body)}")
+        return body
+
+    def scrape_url(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        body = self._post_json("/v1/scrape", {"url": url, **(params or {})}, "scrape URL")
+        if "data" not in body:
+            raise Exception(f"Failed to scrape URL. Error: {body}")
+        return body["data"]
+
+    def map_url(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        body = self._post_json("/v1/map", {"url": url, **(params or {})}, "map URL")
+        if "links" not in body:
+            raise Exception(f"Failed to map URL. Error: {body}")
+        return body
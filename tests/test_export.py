@@ -0,0 +1,38 @@
+import io
+import json
+
+import pandas as pd
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from firecrawl_scraper.columnar import to_arrow_table
+from firecrawl_scraper.export import export_result
+
+FIELDS = [{"name": "n", "type": "int"}, {"name": "title", "type": "str"}]
+
+
+def result_with_null_int():
+    df = pd.DataFrame({"n": pd.array([1, None, 3], dtype="Int64"), "title": ["a", "b", "c"]})
+    return to_arrow_table(df, FIELDS)
+
+
+def export(fmt):
+    buffer = io.BytesIO()
+    export_result(result_with_null_int(), fmt, buffer)
+    return buffer.getvalue()
+
+
+def test_csv_keeps_nullable_ints_whole():
+    assert export("csv").decode().splitlines() == ["n,title", "1,a", ",b", "3,c"]
+    assert pacsv.read_csv(io.BytesIO(export("csv"))).column("n").to_pylist() == [1, None, 3]
+
+
+def test_jsonl_keeps_nullable_ints_whole():
+    rows = [json.loads(line) for line in export("jsonl").decode().splitlines()]
+    assert [row["n"] for row in rows] == [1, None, 3]
+    assert all(isinstance(row["n"], int) for row in rows if row["n"] is not None)
+
+
+def test_parquet_round_trips_nullable_ints():
+    table = pq.read_table(io.BytesIO(export("parquet")))
+    assert table.column("n").to_pylist() == [1, None, 3]
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from firecrawl_scraper.core import format_extraction_result
+from firecrawl_scraper.flatten import PARENT_COLUMN, flatten_result, primary_table
+
+
+def test_payload_with_only_empty_lists_has_no_data():
+    assert flatten_result({"data": {"projects": []}}) == {}
+    assert format_extraction_result({"data": {"projects": []}}) == "No data extracted"
+    assert format_extraction_result({"data": {"projects": [], "links": []}}) == "No data extracted"
+    assert format_extraction_result({"data": {}}) == "No data extracted"
+
+
+def test_root_scalars_survive_empty_lists():
+    result = format_extraction_result({"data": {"site": "example", "projects": []}})
+    assert isinstance(result, pd.DataFrame)
+    assert result.to_dict("records") == [{"site": "example"}]
+
+
+def test_stacked_tables_keep_parent_rows_integral():
+    payload = {"data": {"projects": [{"title": "a", "links": [{"url": "x"}, {"url": "y"}]}], "people": [{"name": "z"}]}}
+    combined = primary_table(flatten_result(payload))
+    assert combined[PARENT_COLUMN].dtype == "Int64"
+    assert combined[PARENT_COLUMN].dropna().tolist() == [0, 0]